@@ -0,0 +1,39 @@
+"""Runs the server on a SO_REUSEPORT socket so a new process can bind the
+same port while the old one hands over its rooms (see handoff.py).
+
+    python -m app
+"""
+from __future__ import annotations
+
+import socket
+
+import uvicorn
+
+from .config import BIND_HOST, BIND_PORT, WS_PING_INTERVAL, WS_PING_TIMEOUT
+from .handoff import handoff
+
+
+def main() -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((BIND_HOST, BIND_PORT))
+
+    server = uvicorn.Server(uvicorn.Config(
+        "app.main:app",
+        proxy_headers=True,
+        ws_ping_interval=WS_PING_INTERVAL,
+        ws_ping_timeout=WS_PING_TIMEOUT,
+    ))
+
+    def stop_listening() -> None:
+        for listener in server.servers:
+            listener.close()
+
+    handoff.enabled = True
+    handoff.stop_listening = stop_listening
+    server.run(sockets=[sock])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+import threading
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from .admission import admission
+from .analytics import analytics_exporter
+from .config import ADMIN_TOKEN, DATA_DIR, PROFILE_DEFAULT_INTERVAL, PROFILE_MAX_SECONDS, TRAFFIC_CAPTURE_DIR
+from .connection_manager import send_stats
+from .memory import shared_strings
+from .moderation import moderation_stats
+from .profiling import profiler, room_cpu, stall_detector
+from .room_manager import room_manager
+from .traffic import traffic_recorder
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin(x_admin_token: str = Header("")) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    if not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/memory")
+async def memory_overview():
+    seen = shared_strings()
+    rooms = [room.memory_usage(seen) for room in room_manager._rooms.values()]
+    subsystems: dict[str, int] = {}
+    for usage in rooms:
+        for name, size in usage["subsystems"].items():
+            subsystems[name] = subsystems.get(name, 0) + size
+    rooms.sort(key=lambda r: r["total"], reverse=True)
+    return {
+        "room_count": len(rooms),
+        "total": sum(subsystems.values()),
+        "subsystems": subsystems,
+        "rooms": [{"room_id": r["room_id"], "total": r["total"]} for r in rooms],
+    }
+
+
+@router.get("/memory/{room_id}")
+async def room_memory(room_id: str):
+    room = room_manager._rooms.get(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return room.memory_usage()
+
+
+@router.get("/traffic")
+async def traffic_status():
+    return traffic_recorder.status()
+
+
+@router.post("/traffic/start")
+async def traffic_start():
+    traffic_recorder.start(Path(TRAFFIC_CAPTURE_DIR) if TRAFFIC_CAPTURE_DIR else DATA_DIR / "traffic")
+    return traffic_recorder.status()
+
+
+@router.post("/traffic/stop")
+async def traffic_stop():
+    await traffic_recorder.stop()
+    return traffic_recorder.status()
+
+
+@router.post("/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(PROFILE_DEFAULT_INTERVAL * 1000, ge=1, le=1000),
+):
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    loop_thread_id = threading.get_ident()
+    try:
+        return await asyncio.to_thread(profiler.run, loop_thread_id, seconds, interval_ms / 1000)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/stalls")
+async def stalls():
+    return stall_detector.status()
+
+
+@router.get("/cpu")
+async def cpu_report():
+    return room_cpu.report()
+
+
+@router.post("/cpu/start")
+async def cpu_start():
+    room_cpu.start()
+    return room_cpu.report()
+
+
+@router.post("/cpu/stop")
+async def cpu_stop():
+    room_cpu.stop()
+    return room_cpu.report()
+
+
+@router.get("/admission")
+async def admission_status():
+    return {"rooms": room_manager.room_count, **admission.status()}
+
+
+@router.get("/connections")
+async def connection_status():
+    return {
+        "connections": admission.connections,
+        "sockets": sum(room.connections.count for room in room_manager._rooms.values()),
+        **send_stats,
+    }
+
+
+@router.get("/moderation")
+async def moderation_status():
+    return moderation_stats.report()
+
+
+@router.get("/analytics")
+async def analytics_status():
+    return analytics_exporter.status()
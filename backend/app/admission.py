@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .config import (
+    ADMISSION_LAG_HARD,
+    ADMISSION_LAG_SOFT,
+    ADMISSION_PROBE_INTERVAL,
+    ADMISSION_RETRY_AFTER,
+    MAX_CONCURRENT_JOINS,
+    MAX_CONNECTIONS,
+    MAX_CONNECTIONS_PER_ROOM,
+    MAX_ROOMS,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_CLOSE_CODE = 4013  # application-range twin of 1013 "Try Again Later"
+
+
+@dataclass(slots=True)
+class Rejection:
+    reason: str
+    retry_after: int
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "error",
+            "code": "server_busy",
+            "message": self.reason,
+            "retry_after": self.retry_after,
+        }
+
+
+class AdmissionController:
+    """Caps rooms and connections and sheds new admissions when the loop lags.
+
+    Lag is how late a periodic sleep wakes up, smoothed with an EWMA. New
+    rooms are refused first (soft threshold), then new joins (hard
+    threshold); connected users are never dropped, so the heartbeat keeps
+    the existing rooms in sync while the spike drains.
+    """
+
+    def __init__(self) -> None:
+        self.lag = 0.0
+        self.connections = 0
+        self.rejected: dict[str, int] = {}
+        self._join_slots = asyncio.Semaphore(MAX_CONCURRENT_JOINS)
+
+    async def monitor_loop(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(ADMISSION_PROBE_INTERVAL)
+            overshoot = max(0.0, time.monotonic() - start - ADMISSION_PROBE_INTERVAL)
+            self.lag = 0.8 * self.lag + 0.2 * overshoot
+
+    def _reject(self, kind: str, reason: str) -> Rejection:
+        self.rejected[kind] = self.rejected.get(kind, 0) + 1
+        # Jitter so refused clients don't all come back in the same second
+        retry_after = int(ADMISSION_RETRY_AFTER * (1 + random.random()))
+        logger.info("Admission rejected (%s): %s", kind, reason)
+        return Rejection(reason=reason, retry_after=retry_after)
+
+    def check_new_room(self, room_count: int) -> Rejection | None:
+        if room_count >= MAX_ROOMS:
+            return self._reject("room_cap", "Too many rooms")
+        if self.lag > ADMISSION_LAG_SOFT:
+            return self._reject("room_lag", "Server is busy")
+        return None
+
+    def check_join(self, room_connections: int) -> Rejection | None:
+        """For a connection already counted in `connections` but not yet in its room."""
+        if room_connections >= MAX_CONNECTIONS_PER_ROOM:
+            return self._reject("room_full", "Room is full")
+        if self.connections > MAX_CONNECTIONS:
+            return self._reject("connection_cap", "Too many connections")
+        if self.lag > ADMISSION_LAG_HARD:
+            return self._reject("join_lag", "Server is busy")
+        return None
+
+    def join_slot(self) -> asyncio.Semaphore:
+        """Bounds concurrent join handshakes so a join burst can't starve heartbeats."""
+        return self._join_slots
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "lag_ms": self.lag * 1000,
+            "connections": self.connections,
+            "accepting_rooms": self.lag <= ADMISSION_LAG_SOFT,
+            "accepting_joins": self.lag <= ADMISSION_LAG_HARD,
+            "rejected": dict(self.rejected),
+        }
+
+
+admission = AdmissionController()
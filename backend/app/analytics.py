@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import IO, Any
+
+from .config import (
+    ANALYTICS_FLUSH_INTERVAL,
+    ANALYTICS_MAX_PENDING,
+    ANALYTICS_ROTATE_BYTES,
+    ANALYTICS_ROTATE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsBus:
+    """Fire-and-forget usage events (plays, skips, queue adds, joins, drift).
+
+    `publish` is a bounded list append and never blocks or raises; events
+    beyond `max_pending` are counted per type and dropped. Publishing is a
+    no-op until an exporter is running.
+    """
+
+    def __init__(self, max_pending: int = ANALYTICS_MAX_PENDING) -> None:
+        self.enabled = False
+        self.max_pending = max_pending
+        self.published = 0
+        self.dropped: dict[str, int] = {}
+        self._pending: list[dict[str, Any]] = []
+
+    def publish(self, event: str, room_id: str, **fields: Any) -> None:
+        if not self.enabled:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped[event] = self.dropped.get(event, 0) + 1
+            return
+        self._pending.append({"ts": round(time.time(), 3), "event": event, "room_id": room_id, **fields})
+        self.published += 1
+
+    def drain(self) -> list[dict[str, Any]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+class AnalyticsExporter:
+    """Writes bus batches to gzipped NDJSON files from a worker thread.
+
+    Files are written as `*.ndjson.gz.part` and renamed once rotated (by
+    compressed size or age), so anything without the suffix is complete.
+    The pid in the name keeps two processes overlapping during a restart
+    handoff from clobbering each other.
+    """
+
+    def __init__(self, bus: AnalyticsBus, rotate_bytes: int = ANALYTICS_ROTATE_BYTES,
+                 rotate_interval: float = ANALYTICS_ROTATE_INTERVAL) -> None:
+        self.bus = bus
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.directory: Path | None = None
+        self.exported = 0
+        self.files = 0
+        self._path: Path | None = None
+        self._raw: IO[bytes] | None = None
+        self._gz: gzip.GzipFile | None = None
+        self._opened_at = 0.0
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self, directory: Path) -> None:
+        if self._task is not None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.bus.enabled = True
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Analytics export started: %s", directory)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self.bus.enabled = False
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        final = False
+        while not final:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), ANALYTICS_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            final = self._stopping.is_set()  # even when stopped before the first pass
+            batch = self.bus.drain()
+            try:
+                await asyncio.to_thread(self._write, batch, final)
+            except Exception:
+                logger.exception("Analytics export failed; dropped %d events", len(batch))
+                self.bus.dropped["export_error"] = self.bus.dropped.get("export_error", 0) + len(batch)
+                continue
+            self.exported += len(batch)
+
+    # ── Worker thread ────────────────────────────────────────────
+
+    def _open(self) -> None:
+        name = time.strftime("events-%Y%m%d-%H%M%S") + f"-{os.getpid()}.ndjson.gz.part"
+        self._path = self.directory / name
+        self._raw = open(self._path, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._opened_at = time.time()
+
+    def _close(self) -> None:
+        self._gz.close()
+        self._raw.close()
+        os.replace(self._path, self._path.with_suffix(""))
+        self._gz = self._raw = self._path = None
+        self.files += 1
+
+    def _write(self, batch: list[dict[str, Any]], final: bool) -> None:
+        if batch:
+            if self._gz is None:
+                self._open()
+            self._gz.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch).encode())
+        if self._gz is None:
+            return
+        if final or self._raw.tell() >= self.rotate_bytes or time.time() - self._opened_at >= self.rotate_interval:
+            self._close()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.bus.enabled,
+            "directory": str(self.directory) if self.directory else None,
+            "published": self.bus.published,
+            "pending": self.bus.pending,
+            "exported": self.exported,
+            "dropped": dict(self.bus.dropped),
+            "files": self.files,
+            "current_file": str(self._path) if self._path else None,
+        }
+
+
+analytics = AnalyticsBus()
+analytics_exporter = AnalyticsExporter(analytics)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import shutil
+import sys
+from array import array
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .config import CHAT_MAX_SEGMENTS, CHAT_SEGMENT_SIZE
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# On-disk / snapshot record: [seq, user_id, display_name, message, timestamp, is_system]
+Record = list[Any]
+
+
+class ChatHistory:
+    """Append-only chat log: a packed in-memory ring of recent messages
+    backed by NDJSON segments on local disk.
+
+    Every message gets a sequence number on append. The ring holds the
+    latest `maxlen` messages as packed columns (timestamps, sender indices
+    and flags in arrays; (user_id, display_name) pairs once in a sender
+    table). Messages are also buffered into segments of `segment_size`
+    that are written from a worker thread once full, so older history can
+    be paged in from disk without growing RAM.
+    """
+
+    __slots__ = (
+        "maxlen", "directory", "segment_size", "_start", "_len", "_first_seq", "_next_seq",
+        "_timestamps", "_senders", "_flags", "_messages", "_sender_table", "_sender_index",
+        "_pending", "_segments", "_writes",
+    )
+
+    def __init__(self, maxlen: int, directory: Path | None = None, segment_size: int = CHAT_SEGMENT_SIZE) -> None:
+        self.maxlen = maxlen
+        self.directory = directory
+        self.segment_size = min(segment_size, maxlen)
+        self._start = 0
+        self._len = 0
+        self._first_seq = 1  # seq of the oldest message in the ring
+        self._next_seq = 1
+        self._timestamps = array("d", bytes(8 * maxlen))
+        self._senders = array("I", bytes(4 * maxlen))
+        self._flags = bytearray(maxlen)
+        self._messages: list[str] = [""] * maxlen
+        self._sender_table: list[tuple[str, str]] = []
+        self._sender_index: dict[tuple[str, str], int] = {}
+        self._pending: list[Record] = []
+        self._segments: list[int] = self._list_segments()  # first seq of each segment on disk
+        self._writes: set[asyncio.Future] = set()
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    # ── Ring buffer ──────────────────────────────────────────────
+
+    def _sender_id(self, user_id: str, display_name: str) -> int:
+        key = (sys.intern(user_id), sys.intern(display_name))
+        idx = self._sender_index.get(key)
+        if idx is None:
+            if len(self._sender_table) >= 2 * self.maxlen:
+                self._compact_senders()
+            idx = len(self._sender_table)
+            self._sender_table.append(key)
+            self._sender_index[key] = idx
+        return idx
+
+    def _compact_senders(self) -> None:
+        """Drops sender table entries no longer referenced by any record."""
+        live: dict[int, int] = {}
+        table: list[tuple[str, str]] = []
+        for i in range(self._len):
+            slot = (self._start + i) % self.maxlen
+            old = self._senders[slot]
+            if old not in live:
+                live[old] = len(table)
+                table.append(self._sender_table[old])
+            self._senders[slot] = live[old]
+        self._sender_table = table
+        self._sender_index = {key: i for i, key in enumerate(table)}
+
+    def _push(self, msg: ChatMessage) -> None:
+        sender = self._sender_id(msg.user_id, msg.display_name)
+        if self._len < self.maxlen:
+            slot = (self._start + self._len) % self.maxlen
+            self._len += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.maxlen
+            self._first_seq += 1
+        self._timestamps[slot] = msg.timestamp
+        self._senders[slot] = sender
+        self._flags[slot] = msg.is_system
+        self._messages[slot] = msg.message
+
+    def _record(self, i: int) -> ChatMessage:
+        slot = (self._start + i) % self.maxlen
+        user_id, display_name = self._sender_table[self._senders[slot]]
+        return ChatMessage(
+            user_id=user_id,
+            display_name=display_name,
+            message=self._messages[slot],
+            timestamp=self._timestamps[slot],
+            is_system=bool(self._flags[slot]),
+            seq=self._first_seq + i,
+        )
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        for i in range(self._len):
+            yield self._record(i)
+
+    def latest(self, n: int) -> list[ChatMessage]:
+        return [self._record(i) for i in range(max(0, self._len - n), self._len)]
+
+    # ── Appending ────────────────────────────────────────────────
+
+    def append(self, msg: ChatMessage) -> None:
+        msg.seq = self._next_seq
+        self._next_seq += 1
+        if self._len == 0:
+            self._first_seq = msg.seq
+        self._push(msg)
+        if self.directory is None:
+            return
+        self._pending.append(_to_record(msg))
+        if len(self._pending) >= self.segment_size:
+            self._seal_segment()
+
+    def extend(self, messages: Iterable[ChatMessage]) -> None:
+        for msg in messages:
+            self.append(msg)
+
+    def _seal_segment(self) -> None:
+        batch, self._pending = self._pending, []
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._write_segment(batch):
+                _unlink_all(self._add_segment(batch[0][0]))
+            return
+        future = loop.run_in_executor(None, self._write_segment, batch)
+        self._writes.add(future)
+        future.add_done_callback(self._segment_written)
+
+    def _segment_written(self, future: asyncio.Future) -> None:
+        """Done callback, on the loop thread: the worker only writes the file."""
+        self._writes.discard(future)
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        evicted = self._add_segment(future.result())
+        if evicted:
+            asyncio.get_running_loop().run_in_executor(None, _unlink_all, evicted)
+
+    # ── Disk segments ────────────────────────────────────────────
+
+    def _list_segments(self) -> list[int]:
+        if self.directory is None or not self.directory.is_dir():
+            return []
+        return sorted(int(p.stem) for p in self.directory.glob("*.ndjson") if p.stem.isdigit())
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:010d}.ndjson"
+
+    def _write_segment(self, batch: list[Record]) -> int | None:
+        """Writes one segment file; returns its first seq, or None on failure."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._segment_path(batch[0][0]), "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in batch))
+        except OSError:
+            logger.exception("Failed to write chat segment for %s", self.directory)
+            return None
+        return batch[0][0]
+
+    def _add_segment(self, first_seq: int) -> list[Path]:
+        """Records a written segment; returns the paths of segments evicted beyond CHAT_MAX_SEGMENTS."""
+        insort(self._segments, first_seq)
+        evicted = []
+        while len(self._segments) > CHAT_MAX_SEGMENTS:
+            evicted.append(self._segment_path(self._segments.pop(0)))
+        return evicted
+
+    def _read_before(self, before: int, limit: int) -> list[Record]:
+        """Newest-first scan of disk segments for up to `limit` records with seq < before."""
+        records: list[Record] = []
+        segments = list(self._segments)
+        idx = bisect_left(segments, before) - 1
+        while idx >= 0 and len(records) < limit:
+            try:
+                with open(self._segment_path(segments[idx]), encoding="utf-8") as f:
+                    chunk = [r for r in map(json.loads, f) if r[0] < before]
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable chat segment %s", segments[idx])
+                chunk = []
+            records[:0] = chunk[-(limit - len(records)):]
+            idx -= 1
+        return records
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest message still retrievable."""
+        if self._segments:
+            return min(self._segments[0], self._first_seq)
+        return self._first_seq
+
+    async def flush(self) -> None:
+        """Writes buffered messages and waits for in-flight segment writes."""
+        if self._pending:
+            self._seal_segment()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def page(self, before: int, limit: int) -> tuple[list[ChatMessage], bool]:
+        """Up to `limit` messages with seq < before, oldest first, and whether older ones exist."""
+        start = max(0, min(self._len, before - self._first_seq))
+        messages = [self._record(i) for i in range(max(0, start - limit), start)]
+        upper = messages[0].seq if messages else min(before, self._first_seq)
+        if len(messages) < limit and upper > self.oldest_seq and self._segments:
+            if self._writes:
+                await asyncio.gather(*self._writes, return_exceptions=True)
+            older = await asyncio.to_thread(self._read_before, upper, limit - len(messages))
+            messages[:0] = [_from_record(r) for r in older]
+        has_more = bool(messages) and messages[0].seq > self.oldest_seq
+        return messages, has_more
+
+    async def discard(self) -> None:
+        """Drops the in-memory ring and deletes the on-disk log once in-flight writes finish."""
+        self._pending.clear()
+        self._len = 0
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        self._segments = []
+        if self.directory is not None:
+            await asyncio.to_thread(shutil.rmtree, self.directory, True)
+
+    # ── Snapshots ────────────────────────────────────────────────
+
+    def records(self) -> list[Record]:
+        return [_to_record(m) for m in self]
+
+    def restore(self, records: list[Record], next_seq: int) -> None:
+        """Reloads the ring from snapshot records without re-writing them to disk."""
+        for r in records[-self.maxlen:]:
+            msg = _from_record(r)
+            if self._len == 0:
+                self._first_seq = msg.seq
+            self._push(msg)
+        self._next_seq = max(next_seq, self._first_seq + self._len)
+        if not self._len:
+            self._first_seq = self._next_seq
+
+
+def _unlink_all(paths: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _to_record(msg: ChatMessage) -> Record:
+    return [msg.seq, msg.user_id, msg.display_name, msg.message, msg.timestamp, msg.is_system]
+
+
+def _from_record(r: Record) -> ChatMessage:
+    seq, user_id, display_name, message, timestamp, is_system = r
+    return ChatMessage(
+        user_id=user_id,
+        display_name=display_name,
+        message=message,
+        timestamp=timestamp,
+        is_system=is_system,
+        seq=seq,
+    )
@@ -17,6 +17,95 @@ HEARTBEAT_INTERVAL = 1.0  # seconds
 SYNC_REPORT_INTERVAL = 5.0  # seconds (client-side)
 DRIFT_THRESHOLD = 2.0  # seconds before forced seek
 HOST_GRACE_PERIOD = 60.0  # seconds before host transfer
-CHAT_HISTORY_LIMIT = 100
+CHAT_HISTORY_LIMIT = 100  # recent messages kept in memory
 RECONNECT_WINDOW = 30.0  # seconds before erasing disconnected user
 MAX_MESSAGE_LENGTH = 500
+
+DATA_DIR = Path(os.environ.get("SYNC_DATA_DIR", Path(__file__).resolve().parent.parent / "data"))
+
+VIDEOS_DIR = Path(os.environ.get("VIDEOS_DIR", "/home/clawdbot/videos"))
+VIDEOS_URL_PATH = "/videos/"  # nginx location serving VIDEOS_DIR
+LIBRARY_INDEX_PATH = DATA_DIR / "library_index.json"
+LIBRARY_RESCAN_INTERVAL = 300.0  # seconds
+
+PRELOAD_LEAD_TIME = 15.0  # seconds before the current video ends to announce the next one
+READY_QUORUM = 0.75  # fraction of connected users that must report ready before a new video starts
+READY_TIMEOUT = 5.0  # seconds to wait for the ready quorum before starting anyway
+
+SEARCH_INDEX_PATH = DATA_DIR / "search_index.json"
+SEARCH_RESULTS_LIMIT = 8
+SEARCH_LOCAL_MIN_RESULTS = 3  # fewer local hits than this falls through to the YouTube API
+SEARCH_QUERY_CACHE_SIZE = 5000  # remembered query -> result lists
+SEARCH_INDEX_SAVE_INTERVAL = 60.0  # seconds
+
+YOUTUBE_API_BATCH_SIZE = 50  # max ids per videos.list / playlistItems.list call
+
+ROOM_STORE_DIR = DATA_DIR / "rooms"
+ROOM_HIBERNATE_AFTER = 600.0  # seconds without connections before a room is evicted to disk
+ROOM_STORE_TTL = 30 * 86400.0  # seconds before a hibernated room is deleted for good
+
+ADMIN_TOKEN = os.environ.get("SYNC_ADMIN_TOKEN", "")  # empty disables /api/admin
+
+TRAFFIC_CAPTURE_DIR = os.environ.get("SYNC_TRAFFIC_CAPTURE_DIR", "")  # set to record inbound WS traffic
+TRAFFIC_FLUSH_INTERVAL = 1.0  # seconds
+TRAFFIC_MAX_PENDING = 100_000  # buffered events before new ones are dropped
+
+LOOP_STALL_THRESHOLD = float(os.environ.get("SYNC_LOOP_STALL_THRESHOLD", "0"))  # seconds; 0 disables the detector
+PROFILE_MAX_SECONDS = 60.0
+PROFILE_DEFAULT_INTERVAL = 0.005  # seconds between stack samples
+
+MAX_ROOMS = 1000
+MAX_CONNECTIONS = 5000
+MAX_CONNECTIONS_PER_ROOM = 100
+MAX_CONCURRENT_JOINS = 20  # join handshakes (state snapshot + broadcasts) in flight at once
+ADMISSION_PROBE_INTERVAL = 0.25  # seconds between event loop lag probes
+ADMISSION_LAG_SOFT = 0.05  # seconds of smoothed loop lag before new rooms are refused
+ADMISSION_LAG_HARD = 0.2  # seconds of smoothed loop lag before new joins are refused
+ADMISSION_RETRY_AFTER = 5.0  # base seconds clients are told to wait
+
+CHAT_LOG_DIR = DATA_DIR / "chat"
+CHAT_PAGE_SIZE = 30  # messages in the join snapshot and default page size
+CHAT_MAX_PAGE_SIZE = 100
+CHAT_SEGMENT_SIZE = 50  # messages per on-disk segment; must not exceed CHAT_HISTORY_LIMIT
+CHAT_MAX_SEGMENTS = 200  # per room; older segments are deleted
+
+THUMBNAIL_UPSTREAM = os.environ.get("SYNC_THUMBNAIL_UPSTREAM", "https://img.youtube.com/vi/{youtube_id}/{variant}.jpg")
+THUMBNAIL_VARIANTS = {"small": "default", "medium": "mqdefault"}  # size -> upstream variant
+THUMBNAIL_POSTER_WIDTHS = {"small": 120, "medium": 320}  # size -> width of generated local posters
+THUMBNAIL_PUBLIC_PATH = "/sync/api/thumbnails"  # as seen by browsers through nginx
+THUMBNAIL_CACHE_DIR = DATA_DIR / "thumbnails"
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+THUMBNAIL_MAX_AGE = 7 * 86400  # seconds, Cache-Control max-age
+THUMBNAIL_MISS_TTL = 60.0  # seconds a failed fetch or render is remembered before retrying
+THUMBNAIL_UNLINK_DELAY = 30.0  # seconds an evicted file is kept for responses still streaming it
+
+BIND_HOST = os.environ.get("SYNC_HOST", "127.0.0.1")  # used by `python -m app`
+BIND_PORT = int(os.environ.get("SYNC_PORT", "8001"))
+HANDOFF_SOCKET = Path(os.environ.get("SYNC_HANDOFF_SOCKET", DATA_DIR / "handoff.sock"))
+HANDOFF_TIMEOUT = 10.0  # seconds to wait for each step of a takeover
+HANDOFF_RECONNECT_JITTER = 3.0  # seconds clients spread their reconnects over
+HANDOFF_DRAIN_TIMEOUT = 30.0  # seconds the old process waits for sockets to close before exiting
+
+SPECTATOR_EVENT_TYPES = frozenset({"sync", "queue_updated", "chat_message"})  # broadcasts mirrored to SSE spectators
+SPECTATOR_BUFFER_SIZE = 256  # encoded frames kept per room for slow spectators
+SPECTATOR_KEEPALIVE = 15.0  # seconds between SSE comments on a quiet stream
+SPECTATOR_RETRY_MS = 3000  # EventSource reconnect delay sent to clients
+MAX_SPECTATORS_PER_ROOM = 2000
+
+ANALYTICS_DIR = os.environ.get("SYNC_ANALYTICS_DIR", str(DATA_DIR / "analytics"))  # empty disables export
+ANALYTICS_MAX_PENDING = 50_000  # buffered events before new ones are dropped
+ANALYTICS_FLUSH_INTERVAL = 5.0  # seconds
+ANALYTICS_ROTATE_BYTES = 32 * 1024 * 1024  # compressed bytes per file
+ANALYTICS_ROTATE_INTERVAL = 3600.0  # seconds per file
+
+WS_PING_INTERVAL = 20.0  # seconds between protocol-level pings (python -m app)
+WS_PING_TIMEOUT = 20.0  # seconds without a pong before the socket is dropped
+WS_SEND_TIMEOUT = 5.0  # seconds a single send may take before it counts as failed
+WS_MAX_SEND_FAILURES = 3  # consecutive failed sends before a socket is reaped
+
+MODERATION_TERMS_FILE = os.environ.get("SYNC_MODERATION_TERMS", "")  # one banned term per line, applied to every room
+MODERATION_MAX_ROOM_TERMS = 200
+CHAT_FLOOD_WINDOW = 5.0  # seconds
+CHAT_FLOOD_MAX_MESSAGES = 5  # per user per CHAT_FLOOD_WINDOW
+CHAT_DUPLICATE_WINDOW = 30.0  # seconds
+CHAT_DUPLICATE_LIMIT = 2  # identical (normalized) messages per user per CHAT_DUPLICATE_WINDOW
@@ -1,19 +1,88 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from collections import deque
+from itertools import islice
 from typing import Any
 
 from fastapi import WebSocket
 
+from .config import SPECTATOR_BUFFER_SIZE, SPECTATOR_EVENT_TYPES, WS_MAX_SEND_FAILURES, WS_SEND_TIMEOUT
+
 logger = logging.getLogger(__name__)
 
+REAPED_CLOSE_CODE = 1011
+
+# Process-wide counters, shown at /api/admin/connections
+send_stats = {"failures": 0, "timeouts": 0, "reaped": 0}
+_closing: set[asyncio.Task] = set()
+
+
+def sse_frame(event: str, payload: str) -> bytes:
+    return f"event: {event}\ndata: {payload}\n\n".encode()
+
+
+class SpectatorFeed:
+    """Pre-encoded SSE frames shared by every spectator of a room.
+
+    Each mirrored broadcast is encoded once into a bounded ring; readers
+    keep their own cursor into it. A reader that falls more than `maxlen`
+    frames behind skips ahead rather than buffering on its behalf.
+    """
+
+    def __init__(self, maxlen: int = SPECTATOR_BUFFER_SIZE) -> None:
+        self.count = 0
+        self.closed = False
+        self._frames: deque[bytes] = deque(maxlen=maxlen)
+        self._next = 0  # seq of the next frame
+        self._wakeup = asyncio.Event()
+
+    @property
+    def cursor(self) -> int:
+        return self._next
+
+    def publish(self, event: str, payload: str) -> None:
+        if not self.count:
+            return
+        self._frames.append(sse_frame(event, payload))
+        self._next += 1
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def read(self, cursor: int, timeout: float) -> tuple[list[bytes], int]:
+        """Frames published since `cursor` (waiting up to `timeout` for one) and the new cursor."""
+        if cursor == self._next and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        oldest = self._next - len(self._frames)
+        return list(islice(self._frames, max(cursor, oldest) - oldest, None)), self._next
+
 
 class ConnectionManager:
-    """Per-room WebSocket connection registry."""
+    """Per-room WebSocket connection registry.
+
+    Every send is bounded by WS_SEND_TIMEOUT. A socket that fails
+    WS_MAX_SEND_FAILURES sends in a row is dropped from the registry and
+    closed, which ends its receive loop and takes the normal disconnect
+    path in the endpoint. Peers that stall without failing are left to
+    the server's ping timeout.
+    """
 
     def __init__(self) -> None:
         self._connections: dict[str, WebSocket] = {}  # user_id -> WebSocket
+        self._failures: dict[str, int] = {}  # user_id -> consecutive failed sends
+        self.spectators = SpectatorFeed()
 
     @property
     def connections(self) -> dict[str, WebSocket]:
@@ -24,6 +93,7 @@ class ConnectionManager:
 
     def remove(self, user_id: str) -> None:
         self._connections.pop(user_id, None)
+        self._failures.pop(user_id, None)
 
     def get(self, user_id: str) -> WebSocket | None:
         return self._connections.get(user_id)
@@ -32,23 +102,55 @@ class ConnectionManager:
     def count(self) -> int:
         return len(self._connections)
 
+    async def _send(self, user_id: str, ws: WebSocket, payload: str) -> None:
+        try:
+            async with asyncio.timeout(WS_SEND_TIMEOUT):
+                await ws.send_text(payload)
+        except asyncio.TimeoutError:
+            send_stats["timeouts"] += 1
+            logger.debug("Send to %s timed out", user_id)
+        except Exception:
+            logger.debug("Failed to send to %s", user_id)
+        else:
+            if self._failures:
+                self._failures.pop(user_id, None)
+            return
+        send_stats["failures"] += 1
+        failures = self._failures.get(user_id, 0) + 1
+        self._failures[user_id] = failures
+        if failures >= WS_MAX_SEND_FAILURES:
+            self._reap(user_id, ws)
+
+    def _reap(self, user_id: str, ws: WebSocket) -> None:
+        if self._connections.get(user_id) is ws:
+            del self._connections[user_id]
+        self._failures.pop(user_id, None)
+        send_stats["reaped"] += 1
+        logger.info("Reaping dead connection %s", user_id)
+        task = asyncio.create_task(_close_quietly(ws))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
     async def send_to(self, user_id: str, data: dict[str, Any]) -> None:
         ws = self._connections.get(user_id)
         if ws:
-            try:
-                await ws.send_text(json.dumps(data))
-            except Exception:
-                logger.debug("Failed to send to %s", user_id)
+            await self._send(user_id, ws, json.dumps(data))
 
     async def broadcast(self, data: dict[str, Any], exclude: str | None = None) -> None:
         payload = json.dumps(data)
+        if data.get("type") in SPECTATOR_EVENT_TYPES:
+            self.spectators.publish(data["type"], payload)
+        # Inline rather than a task per socket: sends normally complete without suspending
         for uid, ws in list(self._connections.items()):
-            if uid == exclude:
-                continue
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                logger.debug("Failed to broadcast to %s", uid)
+            if uid != exclude:
+                await self._send(uid, ws, payload)
 
     async def broadcast_all(self, data: dict[str, Any]) -> None:
         await self.broadcast(data)
+
+
+async def _close_quietly(ws: WebSocket) -> None:
+    try:
+        await asyncio.wait_for(ws.close(code=REAPED_CLOSE_CODE), WS_SEND_TIMEOUT)
+    except Exception:
+        logger.debug("Failed to close reaped socket")
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import secrets
+import signal
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from .config import (
+    HANDOFF_DRAIN_TIMEOUT,
+    HANDOFF_RECONNECT_JITTER,
+    HANDOFF_SOCKET,
+    HANDOFF_TIMEOUT,
+    RECONNECT_WINDOW,
+)
+from .room import Room
+from .room_manager import RoomManager, room_manager
+
+logger = logging.getLogger(__name__)
+
+SERVICE_RESTART_CLOSE_CODE = 1012
+_HEADER = struct.Struct(">I")
+
+
+async def _send(writer: asyncio.StreamWriter, data: dict[str, Any]) -> None:
+    body = await asyncio.to_thread(lambda: json.dumps(data, separators=(",", ":")).encode())
+    writer.write(_HEADER.pack(len(body)) + body)
+    await writer.drain()
+
+
+async def _recv(reader: asyncio.StreamReader) -> dict[str, Any]:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    body = await reader.readexactly(size)
+    return await asyncio.to_thread(json.loads, body)
+
+
+def reconnect_frame(resume_token: str | None = None) -> dict[str, Any]:
+    frame = {"type": "reconnect", "delay_ms": random.randint(0, int(HANDOFF_RECONNECT_JITTER * 1000))}
+    if resume_token:
+        frame["resume_token"] = resume_token
+    return frame
+
+
+class HandoffCoordinator:
+    """Moves live rooms from an old server process to its replacement.
+
+    On startup the new process connects to the old one over a unix socket
+    and asks for a takeover. The old process snapshots its rooms (the same
+    format used for hibernation), issues a resume token for every
+    connected user and sends both over. Once the new process acknowledges,
+    the old one tells each client to reconnect after a jittered delay with
+    its token, closes the sockets and exits when they have drained.
+    Resumed clients get their old user back instead of joining anew.
+
+    Only `python -m app` enables this, after binding its port: a process
+    that fails to bind must never take the rooms.
+    """
+
+    def __init__(self, path: Path, manager: RoomManager) -> None:
+        self.path = path
+        self.manager = manager
+        self.enabled = False  # set by `python -m app` once it has bound its socket
+        self.draining = False
+        self.stop_listening: Callable[[], None] | None = None  # set by `python -m app`
+        self._server: asyncio.AbstractServer | None = None
+        self._transferred: set[str] = set()
+        self._resume: dict[str, tuple[str, str]] = {}  # token -> (room_id, user_id)
+        self._tasks: set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self) -> None:
+        """Takes over from a running predecessor, if any, then waits for a successor."""
+        await self._take_over()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            self._server = await asyncio.start_unix_server(self._handle_successor, path=str(self.path))
+        except OSError:
+            logger.exception("Failed to listen for handoff on %s", self.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if not self.draining:
+                self.path.unlink(missing_ok=True)
+        for task in list(self._tasks):
+            task.cancel()
+
+    def transferred(self, room_id: str) -> bool:
+        return room_id in self._transferred
+
+    def claim(self, token: Any, room_id: str) -> str | None:
+        """Returns the user id a resume token was issued for, once."""
+        if not isinstance(token, str):
+            return None
+        entry = self._resume.pop(token, None)
+        if entry is None or entry[0] != room_id:
+            return None
+        return entry[1]
+
+    # ── New process ──────────────────────────────────────────────
+
+    async def _take_over(self) -> None:
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(self.path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return
+        except OSError:
+            logger.exception("Failed to reach the previous process on %s", self.path)
+            return
+        try:
+            await _send(writer, {"op": "takeover", "pid": os.getpid()})
+            payload = await asyncio.wait_for(_recv(reader), HANDOFF_TIMEOUT)
+            for snapshot in payload["rooms"]:
+                self.manager.adopt_room(Room.from_snapshot(snapshot, live=True))
+            for token, (room_id, user_id) in payload["tokens"].items():
+                self._resume[token] = (room_id, user_id)
+            await _send(writer, {"op": "ack"})
+        except (OSError, ValueError, KeyError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            logger.exception("Handoff from the previous process failed; starting empty")
+            return
+        finally:
+            writer.close()
+        logger.info("Took over %d rooms and %d connections", len(payload["rooms"]), len(self._resume))
+        self._spawn(self._expire_tokens(dict(self._resume)))
+
+    async def _expire_tokens(self, issued: dict[str, tuple[str, str]]) -> None:
+        """Forgets users that did not come back within RECONNECT_WINDOW."""
+        await asyncio.sleep(RECONNECT_WINDOW)
+        for token, (room_id, user_id) in issued.items():
+            if self._resume.pop(token, None) is None:
+                continue
+            room = self.manager._rooms.get(room_id)
+            if room is not None:
+                room.check_user_cleanup(user_id)
+
+    # ── Old process ──────────────────────────────────────────────
+
+    async def _handle_successor(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        issued: list[tuple[Room, str, str]] = []
+        try:
+            request = await asyncio.wait_for(_recv(reader), HANDOFF_TIMEOUT)
+            if request.get("op") != "takeover" or self.draining:
+                return
+            logger.info("Handing off to process %s", request.get("pid"))
+            self.draining = True
+            self._server.close()
+
+            rooms = list(self.manager._rooms.values())
+            snapshots = []
+            for room in rooms:
+                await room.chat_history.flush()
+                snapshots.append(room.to_snapshot())
+                issued.extend((room, uid, secrets.token_urlsafe(16)) for uid in room.connections.connections)
+            tokens = {token: [room.room_id, uid] for room, uid, token in issued}
+            await _send(writer, {"rooms": snapshots, "tokens": tokens})
+            ack = await asyncio.wait_for(_recv(reader), HANDOFF_TIMEOUT)
+            if ack.get("op") != "ack":
+                raise ValueError(f"unexpected handoff reply {ack!r}")
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            logger.exception("Handoff to the new process failed; staying in service")
+            if self.draining:
+                self.draining = False
+                await self.start()
+            return
+        finally:
+            writer.close()
+        self._spawn(self._drain(rooms, issued))
+
+    async def _drain(self, rooms: list[Room], issued: list[tuple[Room, str, str]]) -> None:
+        for room in rooms:
+            self._transferred.add(room.room_id)
+            self.manager.detach_room(room.room_id)
+        for room, user_id, token in issued:
+            await room.connections.send_to(user_id, reconnect_frame(token))
+        for room, user_id, _token in issued:
+            ws = room.connections.get(user_id)
+            if ws is not None:
+                try:
+                    await ws.close(code=SERVICE_RESTART_CLOSE_CODE)
+                except Exception:
+                    logger.debug("Failed to close %s", user_id)
+
+        # Keep accepting briefly so nobody hits a closed port while the successor binds;
+        # stragglers that land here are bounced with a reconnect frame.
+        await asyncio.sleep(1.0)
+        if self.stop_listening is not None:
+            self.stop_listening()
+
+        deadline = time.monotonic() + HANDOFF_DRAIN_TIMEOUT
+        while time.monotonic() < deadline and any(room.connections.count for room in rooms):
+            await asyncio.sleep(0.1)
+        logger.info("Handoff complete, shutting down")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+handoff = HandoffCoordinator(HANDOFF_SOCKET, room_manager)
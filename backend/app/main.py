@@ -3,15 +3,35 @@ from __future__ import annotations
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI, Query
 from fastapi.responses import JSONResponse
 
 import httpx
 
-from .config import YOUTUBE_API_KEY
+from .admin import router as admin_router
+from .admission import admission
+from .analytics import analytics_exporter
+from .config import (
+    ANALYTICS_DIR,
+    ROOM_STORE_TTL,
+    SEARCH_LOCAL_MIN_RESULTS,
+    SEARCH_RESULTS_LIMIT,
+    TRAFFIC_CAPTURE_DIR,
+    YOUTUBE_API_KEY,
+)
+from .handoff import handoff
+from .media_library import library_scan_loop, media_library
+from .profiling import stall_detector
 from .room_manager import room_manager
+from .room_store import room_store
+from .search_index import search_index
+from .spectators import router as spectators_router
 from .sync_engine import heartbeat_loop
+from .thumbnails import poster_url, thumbnail_url
+from .thumbnails import router as thumbnails_router
+from .traffic import traffic_recorder
 from .ws_endpoint import router as ws_router
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
@@ -19,18 +39,41 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(heartbeat_loop())
+    await asyncio.to_thread(room_store.prune, ROOM_STORE_TTL)
+    await room_manager.load_hibernated()
+    if handoff.enabled:
+        await handoff.start()
+    if TRAFFIC_CAPTURE_DIR:
+        traffic_recorder.start(Path(TRAFFIC_CAPTURE_DIR))
+    stall_detector.start()
+    if ANALYTICS_DIR:
+        analytics_exporter.start(Path(ANALYTICS_DIR))
+    tasks = [
+        asyncio.create_task(heartbeat_loop()),
+        asyncio.create_task(library_scan_loop()),
+        asyncio.create_task(admission.monitor_loop()),
+    ]
     yield
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await handoff.stop()
+    await search_index.save(force=True)
+    await traffic_recorder.stop()
+    await analytics_exporter.stop()
+    await stall_detector.stop()
 
 
 app = FastAPI(title="SyncTube", lifespan=lifespan)
 
 app.include_router(ws_router)
+app.include_router(admin_router)
+app.include_router(thumbnails_router)
+app.include_router(spectators_router)
 
 
 @app.get("/api/health")
@@ -40,6 +83,13 @@ async def health():
 
 @app.post("/api/rooms")
 async def create_room():
+    rejection = admission.check_new_room(room_manager.room_count)
+    if rejection:
+        return JSONResponse(
+            status_code=503,
+            content={"error": rejection.reason, "retry_after": rejection.retry_after},
+            headers={"Retry-After": str(rejection.retry_after)},
+        )
     room = room_manager.create_room()
     return {"room_id": room.room_id}
 
@@ -64,7 +114,13 @@ async def list_rooms():
 
 @app.get("/api/youtube/search")
 async def youtube_search(q: str = Query(..., min_length=1)):
+    await search_index.ensure_loaded()
+    local = search_index.search(q)
+    if len(local) >= SEARCH_LOCAL_MIN_RESULTS:
+        return local
     if not YOUTUBE_API_KEY:
+        if local:
+            return local
         return JSONResponse(status_code=500, content={"error": "YouTube API key not configured"})
     try:
         async with httpx.AsyncClient(timeout=5.0) as client:
@@ -73,12 +129,14 @@ async def youtube_search(q: str = Query(..., min_length=1)):
                 params={
                     "part": "snippet",
                     "type": "video",
-                    "maxResults": 8,
+                    "maxResults": SEARCH_RESULTS_LIMIT,
                     "q": q,
                     "key": YOUTUBE_API_KEY,
                 },
             )
             if resp.status_code != 200:
+                if local:
+                    return local
                 return JSONResponse(status_code=resp.status_code, content={"error": "YouTube API error"})
             data = resp.json()
             results = []
@@ -90,17 +148,34 @@ async def youtube_search(q: str = Query(..., min_length=1)):
                 results.append({
                     "youtube_id": video_id,
                     "title": snippet.get("title", ""),
-                    "thumbnail": snippet.get("thumbnails", {}).get("medium", {}).get("url", ""),
+                    "thumbnail": thumbnail_url(video_id),
                     "channel": snippet.get("channelTitle", ""),
                 })
+            await search_index.add_results(q, results)
+            await search_index.save()
             return results
     except httpx.TimeoutException:
+        if local:
+            return local
         return JSONResponse(status_code=504, content={"error": "YouTube API timeout"})
 
 
+@app.get("/api/library")
+async def list_library(
+    q: str = Query(""),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    entries = media_library.search(q, limit=limit, offset=offset)
+    return {
+        "total": media_library.count,
+        "items": [{**e.to_dict(), "poster": poster_url(e.path)} for e in entries],
+    }
+
+
 @app.get("/api/rooms/{room_id}")
 async def get_room(room_id: str):
-    room = room_manager.get_room(room_id)
+    room = await room_manager.get_room(room_id)
     if not room:
         return {"exists": False}
     return {
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+
+from .config import LIBRARY_INDEX_PATH, LIBRARY_RESCAN_INTERVAL, VIDEOS_DIR, VIDEOS_URL_PATH
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+_LIBRARY_EXTENSIONS = {".mp4", ".m4v", ".mov", ".webm", ".mkv"}
+
+
+@dataclass
+class MediaEntry:
+    path: str  # relative to VIDEOS_DIR, posix separators
+    mtime_ns: int
+    size: int
+    container: str = ""  # "mp4" | "matroska" | ""
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    poster_offset: float = 0.0  # seconds into the video for a poster frame
+
+    @property
+    def title(self) -> str:
+        name = self.path.rsplit("/", 1)[-1]
+        if "." in name:
+            name = name.rsplit(".", 1)[0]
+        return name or "Video"
+
+    @property
+    def url(self) -> str:
+        return VIDEOS_URL_PATH + quote(self.path)
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "title": self.title,
+            "url": self.url,
+            "duration": self.duration,
+            "width": self.width,
+            "height": self.height,
+            "poster_offset": self.poster_offset,
+        }
+
+
+# ── Container header parsing ─────────────────────────────────────
+#
+# Both parsers work on a read-only mmap and only touch box/element
+# headers plus the metadata they need, so the page cache never pulls in
+# media payload even for multi-GB files.
+
+
+def _poster_offset(duration: float) -> float:
+    return round(min(duration * 0.1, 30.0), 3)
+
+
+def _mp4_boxes(buf: mmap.mmap, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _parse_mp4(buf: mmap.mmap) -> dict | None:
+    moov = next(((s, e) for kind, s, e in _mp4_boxes(buf, 0, len(buf)) if kind == b"moov"), None)
+    if moov is None:
+        return None
+
+    info = {"container": "mp4", "duration": 0.0, "width": 0, "height": 0}
+    for kind, s, e in _mp4_boxes(buf, *moov):
+        if kind == b"mvhd":
+            version = buf[s]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", buf, s + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", buf, s + 12)
+            if timescale:
+                info["duration"] = duration / timescale
+        elif kind == b"trak" and not info["width"]:
+            dims = None
+            is_video = False
+            for tkind, ts, te in _mp4_boxes(buf, s, e):
+                if tkind == b"tkhd":
+                    off = ts + (88 if buf[ts] == 1 else 76)
+                    if off + 8 <= te:
+                        w, h = struct.unpack_from(">II", buf, off)
+                        dims = (w >> 16, h >> 16)
+                elif tkind == b"mdia":
+                    for mkind, ms, _ in _mp4_boxes(buf, ts, te):
+                        if mkind == b"hdlr" and buf[ms + 8:ms + 12] == b"vide":
+                            is_video = True
+            if is_video and dims:
+                info["width"], info["height"] = dims
+    return info
+
+
+_EBML_HEADER = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEK_HEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_TIMESTAMP_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_TYPE = 0x83
+_VIDEO = 0xE0
+_PIXEL_WIDTH = 0xB0
+_PIXEL_HEIGHT = 0xBA
+_CLUSTER = 0x1F43B675
+
+
+def _read_vint(buf: mmap.mmap, pos: int, keep_marker: bool) -> tuple[int, int, bool]:
+    """Returns (value, length, is_unknown_size)."""
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML vint")
+    value = first if keep_marker else first & (mask - 1)
+    for i in range(1, length):
+        value = (value << 8) | buf[pos + i]
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _ebml_elements(buf: mmap.mmap, start: int, end: int):
+    pos = start
+    while pos < end:
+        eid, id_len, _ = _read_vint(buf, pos, keep_marker=True)
+        size, size_len, unknown = _read_vint(buf, pos + id_len, keep_marker=False)
+        data = pos + id_len + size_len
+        data_end = end if unknown else min(data + size, end)
+        yield eid, data, data_end, unknown
+        if unknown:
+            return
+        pos = data_end
+
+
+def _ebml_uint(buf: mmap.mmap, s: int, e: int) -> int:
+    return int.from_bytes(buf[s:e], "big")
+
+
+def _parse_matroska(buf: mmap.mmap) -> dict | None:
+    top = _ebml_elements(buf, 0, len(buf))
+    first = next(top, None)
+    if not first or first[0] != _EBML_HEADER:
+        return None
+    segment = next((el for el in top if el[0] == _SEGMENT), None)
+    if segment is None:
+        return None
+    seg_start, seg_end = segment[1], segment[2]
+
+    info = {"container": "matroska", "duration": 0.0, "width": 0, "height": 0}
+    found: set[int] = set()
+    seeks: dict[int, int] = {}
+
+    def read_info(s: int, e: int) -> None:
+        scale = 1_000_000
+        duration = 0.0
+        for eid, ds, de, _ in _ebml_elements(buf, s, e):
+            if eid == _TIMESTAMP_SCALE:
+                scale = _ebml_uint(buf, ds, de)
+            elif eid == _DURATION:
+                fmt = ">d" if de - ds == 8 else ">f"
+                duration = struct.unpack_from(fmt, buf, ds)[0]
+        info["duration"] = duration * scale / 1e9
+        found.add(_INFO)
+
+    def read_tracks(s: int, e: int) -> None:
+        found.add(_TRACKS)
+        for eid, ds, de, _ in _ebml_elements(buf, s, e):
+            if eid != _TRACK_ENTRY:
+                continue
+            track_type = 0
+            dims = (0, 0)
+            for teid, ts, te, _ in _ebml_elements(buf, ds, de):
+                if teid == _TRACK_TYPE:
+                    track_type = _ebml_uint(buf, ts, te)
+                elif teid == _VIDEO:
+                    w = h = 0
+                    for veid, vs, ve, _ in _ebml_elements(buf, ts, te):
+                        if veid == _PIXEL_WIDTH:
+                            w = _ebml_uint(buf, vs, ve)
+                        elif veid == _PIXEL_HEIGHT:
+                            h = _ebml_uint(buf, vs, ve)
+                    dims = (w, h)
+            if track_type == 1:
+                info["width"], info["height"] = dims
+                return
+
+    readers = {_INFO: read_info, _TRACKS: read_tracks}
+    for eid, ds, de, _ in _ebml_elements(buf, seg_start, seg_end):
+        if eid in readers:
+            readers[eid](ds, de)
+        elif eid == _SEEK_HEAD:
+            for seid, ss, se, _ in _ebml_elements(buf, ds, de):
+                if seid != _SEEK:
+                    continue
+                target = position = None
+                for keid, ks, ke, _ in _ebml_elements(buf, ss, se):
+                    if keid == _SEEK_ID:
+                        target = _ebml_uint(buf, ks, ke)
+                    elif keid == _SEEK_POSITION:
+                        position = _ebml_uint(buf, ks, ke)
+                if target in readers and position is not None:
+                    seeks[target] = seg_start + position
+        elif eid == _CLUSTER:
+            break
+        if len(found) == len(readers):
+            return info
+
+    # Metadata written after the clusters: follow the SeekHead instead of scanning media.
+    for target, pos in seeks.items():
+        if target in found or pos >= len(buf):
+            continue
+        eid, ds, de, _ = next(_ebml_elements(buf, pos, len(buf)))
+        if eid == target:
+            readers[target](ds, de)
+    return info
+
+
+def probe_file(path: Path) -> dict:
+    """Parses container headers for duration and resolution. Never raises."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            head = buf[:4]
+            if head == b"\x1a\x45\xdf\xa3":
+                info = _parse_matroska(buf)
+            else:
+                info = _parse_mp4(buf)
+    except (OSError, ValueError, IndexError, struct.error, StopIteration):
+        logger.debug("Failed to probe %s", path, exc_info=True)
+        info = None
+    if not info:
+        return {}
+    info["poster_offset"] = _poster_offset(info["duration"])
+    return info
+
+
+# ── Library index ────────────────────────────────────────────────
+
+
+class MediaLibrary:
+    """Incremental index of VIDEOS_DIR keyed by relative path + mtime.
+
+    The saved index is loaded by the first scan in its worker thread;
+    lookups on the loop never touch the disk and see an empty library
+    until then.
+    """
+
+    def __init__(self, root: Path, index_path: Path) -> None:
+        self.root = root
+        self.index_path = index_path
+        self._entries: dict[str, MediaEntry] = {}
+        self._loaded = False
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable library index %s", self.index_path)
+            return
+        finally:
+            self._loaded = True
+        if data.get("version") != INDEX_VERSION:
+            return
+        self._entries = {e["path"]: MediaEntry(**e) for e in data.get("entries", [])}
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "version": INDEX_VERSION,
+            "entries": [asdict(e) for e in self._entries.values()],
+        }))
+        os.replace(tmp, self.index_path)
+
+    def _walk(self, directory: str):
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._walk(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in _LIBRARY_EXTENSIONS:
+                        yield entry
+        except OSError:
+            logger.debug("Cannot list %s", directory)
+
+    def scan(self) -> int:
+        """Re-stats the library and only probes new or modified files.
+
+        Runs in a worker thread; the new index is swapped in atomically.
+        Returns the number of files probed.
+        """
+        if not self._loaded:
+            self.load()
+        if not self.root.is_dir():
+            return 0
+
+        previous = self._entries
+        entries: dict[str, MediaEntry] = {}
+        probed = 0
+        for dirent in self._walk(str(self.root)):
+            try:
+                st = dirent.stat(follow_symlinks=True)
+            except OSError:
+                continue
+            rel = Path(dirent.path).relative_to(self.root).as_posix()
+            known = previous.get(rel)
+            if known and known.mtime_ns == st.st_mtime_ns and known.size == st.st_size:
+                entries[rel] = known
+                continue
+            entries[rel] = MediaEntry(path=rel, mtime_ns=st.st_mtime_ns, size=st.st_size, **probe_file(Path(dirent.path)))
+            probed += 1
+
+        changed = probed > 0 or entries.keys() != previous.keys()
+        self._entries = entries
+        if changed:
+            try:
+                self._save()
+            except OSError:
+                logger.exception("Failed to write library index")
+            logger.info("Media library: %d files, %d probed", len(entries), probed)
+        return probed
+
+    def get(self, path: str) -> MediaEntry | None:
+        return self._entries.get(path)
+
+    def lookup_url(self, url: str) -> MediaEntry | None:
+        path = urlparse(url).path
+        if not path.startswith(VIDEOS_URL_PATH):
+            return None
+        return self.get(unquote(path[len(VIDEOS_URL_PATH):]))
+
+    def search(self, query: str = "", limit: int = 50, offset: int = 0) -> list[MediaEntry]:
+        terms = query.lower().split()
+        matches = [
+            e for e in self._entries.values()
+            if all(t in e.path.lower() for t in terms)
+        ]
+        matches.sort(key=lambda e: e.path.lower())
+        return matches[offset:offset + limit]
+
+    @property
+    def count(self) -> int:
+        return len(self._entries)
+
+
+media_library = MediaLibrary(VIDEOS_DIR, LIBRARY_INDEX_PATH)
+
+
+async def library_scan_loop() -> None:
+    """Rescans the library every LIBRARY_RESCAN_INTERVAL seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(media_library.scan)
+        except Exception:
+            logger.exception("Media library scan error")
+        await asyncio.sleep(LIBRARY_RESCAN_INTERVAL)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from collections import deque
+from enum import Enum
+from typing import Any
+
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+_ATOMIC = (str, bytes, bytearray, int, float, bool, type(None), array, Enum)
+
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """Approximate retained size of `obj` in bytes.
+
+    Follows builtin containers and objects defined in this package (through
+    __dict__ or __slots__). Anything else, such as a WebSocket, is counted
+    shallowly so the walk never wanders into the ASGI server. Objects already
+    in `seen` (shared or interned) are only counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, _ATOMIC):
+        return size
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_sizeof(k, seen) + deep_sizeof(v, seen)
+        return size
+    if isinstance(obj, _CONTAINERS):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+        return size
+
+    if not type(obj).__module__.startswith(__package__ or "app"):
+        return size
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+def shared_strings() -> set[int]:
+    """Seeds a `seen` set with interned constants so they aren't billed to every room."""
+    from .models import SYSTEM_DISPLAY_NAME, SYSTEM_USER_ID
+    return {id(SYSTEM_USER_ID), id(SYSTEM_DISPLAY_NAME), id("youtube"), id("direct")}
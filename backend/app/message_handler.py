@@ -21,6 +21,11 @@ async def handle_message(room: Room, user_id: str, data: dict[str, Any]) -> None
         if error:
             await room.connections.send_to(user_id, error)
 
+    elif msg_type == "add_playlist":
+        error = await room.add_playlist(user_id, data.get("url", ""))
+        if error:
+            await room.connections.send_to(user_id, error)
+
     elif msg_type == "remove_video":
         result = room.remove_video(user_id, data.get("video_id", ""))
         if result == "advance":
@@ -64,6 +69,10 @@ async def handle_message(room: Room, user_id: str, data: dict[str, Any]) -> None
                 "type": "error", "code": "chat_failed", "message": error,
             })
 
+    elif msg_type == "chat_history_before":
+        page = await room.get_chat_page(data.get("before"), data.get("limit"))
+        await room.connections.send_to(user_id, page)
+
     elif msg_type == "play":
         error = room.play(user_id)
         if error:
@@ -101,7 +110,7 @@ async def handle_message(room: Room, user_id: str, data: dict[str, Any]) -> None
         await room.advance_queue()
 
     elif msg_type == "sync_report":
-        pass  # Can log for debugging, no action needed for MVP
+        await room.handle_sync_report(user_id, data)
 
     elif msg_type == "update_settings":
         error = await room.update_settings(user_id, data.get("settings", {}))
@@ -0,0 +1,320 @@
+"""In-process micro-benchmarks for Room operations and serialization.
+
+    python -m app.microbench --out bench.json --baseline previous.json \\
+        [--only queue.] [--sizes 10,100,1000] [--repeat 200]
+
+Each benchmark runs at several sizes (queue length, user count, socket
+count) and reports per-operation timings. "exponent" is the log-log slope
+of the median between the smallest and largest size: ~0 is constant time,
+~1 linear, ~2 quadratic, so complexity regressions show up even when the
+absolute numbers are noisy.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from .chat_history import ChatHistory
+from .config import CHAT_HISTORY_LIMIT
+from .connection_manager import ConnectionManager
+from .models import ChatMessage, UserRole
+from .moderation import ChatModerator
+from .replay import FakeWebSocket, _percentile
+from .room import Room
+from .utils import detect_video_url, extract_youtube_id
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_REPEAT = 200
+REGRESSION_THRESHOLD = 20.0  # percent slower than baseline before a result is flagged
+
+# A benchmark takes a size and returns a zero-argument operation to time
+# (sync or async); setup cost stays outside the measurement.
+Operation = Callable[[], Any]
+Setup = Callable[[int], Awaitable[Operation]]
+
+URL_CORPUS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?t=42",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs",
+    "https://example.com/videos/movie.mp4",
+    "https://cdn.example.com/stream/master.m3u8?token=abc",
+    "https://example.com/page/about",
+    "not a url at all",
+]
+
+
+def _room(users: int = 1) -> tuple[Room, str]:
+    """A room without an on-disk chat log and `users` connected users; returns it and the host id."""
+    room = Room("bench")
+    room.chat_history = ChatHistory(CHAT_HISTORY_LIMIT)
+    room.settings.max_videos_per_user = sys.maxsize
+    host = None
+    for i in range(users):
+        user = room.add_user(f"user{i}")
+        host = host or user.user_id
+    return room, host
+
+
+async def _fill_queue(room: Room, user_id: str, n: int) -> None:
+    for i in range(n):
+        await room.add_video(user_id, f"https://example.com/v{i}.mp4")
+
+
+async def bench_add_video(size: int) -> Operation:
+    room, host = _room()
+    await _fill_queue(room, host, size)
+
+    async def op() -> None:
+        await room.add_video(host, "https://example.com/extra.mp4")
+        room.queue.pop()
+    return op
+
+
+async def bench_remove_video(size: int) -> Operation:
+    room, host = _room()
+    await _fill_queue(room, host, size)
+    middle = room.queue[size // 2]
+
+    def op() -> None:
+        room.remove_video(host, middle.video_id)
+        room.queue.insert(size // 2, middle)
+    return op
+
+
+async def bench_reorder_queue(size: int) -> Operation:
+    room, host = _room()
+    await _fill_queue(room, host, size)
+
+    def op() -> None:
+        room.reorder_queue(host, [v.video_id for v in reversed(room.queue)])
+    return op
+
+
+async def bench_advance_queue(size: int) -> Operation:
+    room, host = _room()
+    await _fill_queue(room, host, size + 1)
+
+    async def op() -> None:
+        finished = room._current_video()
+        await room.advance_queue()
+        room.queue.append(finished)
+    return op
+
+
+async def bench_skip_vote(size: int) -> Operation:
+    room, host = _room(users=size)
+    await _fill_queue(room, host, 1)
+    viewers = [uid for uid, u in room.users.items() if u.role == UserRole.VIEWER]
+    required = max(1, int(len(room._connected_users()) * room.settings.skip_vote_threshold))
+    video_id = room.sync.current_video_id
+    turn = 0
+
+    async def op() -> None:
+        nonlocal turn
+        if len(room.skip_votes) >= required - 1:
+            room.skip_votes.clear()  # stay below the threshold so the video never changes
+        await room.handle_skip_vote(viewers[turn % len(viewers)], video_id)
+        turn += 1
+    return op
+
+
+async def bench_full_state(size: int) -> Operation:
+    room, host = _room(users=size)
+    await _fill_queue(room, host, size)
+    for i in range(CHAT_HISTORY_LIMIT):
+        room.chat_history.append(ChatMessage(user_id=host, display_name="user0", message=f"message {i}"))
+
+    def op() -> None:
+        json.dumps(room.get_full_state(host))
+    return op
+
+
+async def bench_sync_encode(size: int) -> Operation:
+    room, host = _room()
+    await _fill_queue(room, host, 1)
+
+    def op() -> None:
+        json.dumps({"type": "sync", "sync": room.sync.to_dict(), "server_time": time.time()})
+    return op
+
+
+async def bench_extract_youtube_id(size: int) -> Operation:
+    urls = (URL_CORPUS * (size // len(URL_CORPUS) + 1))[:size]
+
+    def op() -> None:
+        for url in urls:
+            extract_youtube_id(url)
+    return op
+
+
+async def bench_detect_video_url(size: int) -> Operation:
+    urls = (URL_CORPUS * (size // len(URL_CORPUS) + 1))[:size]
+
+    def op() -> None:
+        for url in urls:
+            detect_video_url(url)
+    return op
+
+
+async def bench_moderate(size: int) -> Operation:
+    room, host = _room()
+    room.settings.banned_terms = [f"term{i:05d}" for i in range(size)]
+    room.settings.flood_protection = False
+    moderator = ChatModerator(room.settings)
+    burst = [(host, f"message {i} with a term{i % size:05d} and some text", False) for i in range(20)]
+
+    def op() -> None:
+        moderator.check_batch(burst)
+    return op
+
+
+async def bench_broadcast(size: int) -> Operation:
+    manager = ConnectionManager()
+    for i in range(size):
+        manager.add(f"u{i}", FakeWebSocket())
+    room, host = _room()
+    await _fill_queue(room, host, 1)
+    frame = {"type": "sync", "sync": room.sync.to_dict(), "server_time": time.time()}
+
+    async def op() -> None:
+        await manager.broadcast(frame)
+    return op
+
+
+BENCHMARKS: dict[str, tuple[Setup, str]] = {
+    "queue.add_video": (bench_add_video, "queue length"),
+    "queue.remove_video": (bench_remove_video, "queue length"),
+    "queue.reorder_queue": (bench_reorder_queue, "queue length"),
+    "queue.advance_queue": (bench_advance_queue, "queue length"),
+    "skip_vote": (bench_skip_vote, "connected users"),
+    "state.get_full_state": (bench_full_state, "users and queue length"),
+    "state.sync_encode": (bench_sync_encode, "constant"),
+    "utils.extract_youtube_id": (bench_extract_youtube_id, "urls per op"),
+    "utils.detect_video_url": (bench_detect_video_url, "urls per op"),
+    "chat.moderate_burst": (bench_moderate, "banned terms"),
+    "broadcast": (bench_broadcast, "sockets"),
+}
+
+
+async def _measure(op: Operation, repeat: int) -> list[float]:
+    is_async = asyncio.iscoroutinefunction(op)
+    for _ in range(min(10, repeat)):  # warm-up
+        if is_async:
+            await op()
+        else:
+            op()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        if is_async:
+            await op()
+        else:
+            op()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    us = [s * 1e6 for s in samples]
+    median = _percentile(us, 50)
+    return {
+        "median_us": median,
+        "p95_us": _percentile(us, 95),
+        "min_us": min(us),
+        "ops_per_s": 1e6 / median if median else 0.0,
+    }
+
+
+def _exponent(by_size: dict[str, dict[str, float]]) -> float | None:
+    sizes = sorted(int(s) for s in by_size)
+    if len(sizes) < 2:
+        return None
+    lo, hi = by_size[str(sizes[0])]["median_us"], by_size[str(sizes[-1])]["median_us"]
+    if lo <= 0 or hi <= 0:
+        return None
+    return round(math.log(hi / lo) / math.log(sizes[-1] / sizes[0]), 2)
+
+
+async def run(names: list[str], sizes: list[int], repeat: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for name in names:
+        setup, scales_with = BENCHMARKS[name]
+        bench_sizes = sizes[:1] if scales_with == "constant" else sizes
+        by_size = {}
+        for size in bench_sizes:
+            by_size[str(size)] = _stats(await _measure(await setup(size), repeat))
+        results[name] = {"scales_with": scales_with, "sizes": by_size, "exponent": _exponent(by_size)}
+    return results
+
+
+def _delta(current: float, baseline: float) -> float | None:
+    if not baseline:
+        return None
+    return (current - baseline) / baseline * 100
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> dict[str, Any]:
+    """Median change per benchmark and size against a previous run, plus flagged regressions."""
+    changes: dict[str, Any] = {}
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        sizes = {}
+        for size, stats in result["sizes"].items():
+            base_stats = base["sizes"].get(size)
+            if not base_stats:
+                continue
+            pct = _delta(stats["median_us"], base_stats["median_us"])
+            sizes[size] = pct
+            if pct is not None and pct > threshold:
+                regressions.append(f"{name}@{size}: {pct:+.0f}%")
+        exponent_change = None
+        if result["exponent"] is not None and base.get("exponent") is not None:
+            exponent_change = round(result["exponent"] - base["exponent"], 2)
+            if exponent_change > 0.5:
+                regressions.append(f"{name}: scaling exponent {base['exponent']} -> {result['exponent']}")
+        changes[name] = {"median_pct": sizes, "exponent_change": exponent_change}
+    return {"benchmarks": changes, "regressions": regressions}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default="", help="run benchmarks whose name starts with this prefix")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark and size")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="percent slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    names = [name for name in BENCHMARKS if name.startswith(args.only)]
+    if not names:
+        parser.error(f"no benchmark matches {args.only!r}")
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    results: dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "benchmarks": asyncio.run(run(names, sizes, args.repeat)),
+    }
+    if args.baseline:
+        results["comparison"] = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
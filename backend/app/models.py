@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import sys
 import time
 from dataclasses import dataclass, field
 from enum import Enum
 
+SYSTEM_USER_ID = sys.intern("system")
+SYSTEM_DISPLAY_NAME = sys.intern("Sistema")
+
 
 class UserRole(str, Enum):
     HOST = "host"
     VIEWER = "viewer"
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     user_id: str
     display_name: str
@@ -18,6 +22,10 @@ class User:
     connected: bool = True
     disconnected_at: float | None = None
 
+    def __post_init__(self) -> None:
+        self.user_id = sys.intern(self.user_id)
+        self.display_name = sys.intern(self.display_name)
+
     def to_dict(self) -> dict:
         return {
             "user_id": self.user_id,
@@ -27,7 +35,7 @@ class User:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Video:
     video_id: str  # internal uuid
     youtube_id: str  # e.g. "dQw4w9WgXcQ" (empty for direct videos)
@@ -38,6 +46,10 @@ class Video:
     video_type: str = "youtube"  # "youtube" | "direct"
     url: str = ""  # full URL for direct videos
 
+    def __post_init__(self) -> None:
+        self.added_by = sys.intern(self.added_by)
+        self.video_type = sys.intern(self.video_type)
+
     def to_dict(self) -> dict:
         return {
             "video_id": self.video_id,
@@ -51,7 +63,7 @@ class Video:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SyncState:
     current_video_id: str | None = None
     youtube_id: str | None = None
@@ -78,25 +90,47 @@ class SyncState:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class RoomSettings:
     max_videos_per_user: int = 10
     skip_vote_threshold: float = 0.5
+    chat_filter: str = "mask"  # "off" | "mask" | "block" for banned terms
+    block_links: bool = False
+    flood_protection: bool = True
+    banned_terms: list[str] = field(default_factory=list)  # on top of the global list
 
     def to_dict(self) -> dict:
         return {
             "max_videos_per_user": self.max_videos_per_user,
             "skip_vote_threshold": self.skip_vote_threshold,
+            "chat_filter": self.chat_filter,
+            "block_links": self.block_links,
+            "flood_protection": self.flood_protection,
+            "banned_terms": list(self.banned_terms),
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     user_id: str
     display_name: str
     message: str
     timestamp: float = field(default_factory=time.time)
     is_system: bool = False
+    seq: int = 0  # position in the room's chat log, assigned on append
+
+    def __post_init__(self) -> None:
+        self.user_id = sys.intern(self.user_id)
+        self.display_name = sys.intern(self.display_name)
+
+    @classmethod
+    def system(cls, message: str) -> ChatMessage:
+        return cls(
+            user_id=SYSTEM_USER_ID,
+            display_name=SYSTEM_DISPLAY_NAME,
+            message=message,
+            is_system=True,
+        )
 
     def to_dict(self) -> dict:
         return {
@@ -105,4 +139,5 @@ class ChatMessage:
             "message": self.message,
             "timestamp": self.timestamp,
             "is_system": self.is_system,
+            "seq": self.seq,
         }
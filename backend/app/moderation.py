@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .config import (
+    CHAT_DUPLICATE_LIMIT,
+    CHAT_DUPLICATE_WINDOW,
+    CHAT_FLOOD_MAX_MESSAGES,
+    CHAT_FLOOD_WINDOW,
+    MODERATION_TERMS_FILE,
+)
+from .models import RoomSettings
+
+logger = logging.getLogger(__name__)
+
+BLOCK_MESSAGES = {
+    "flood": "You're sending messages too fast",
+    "duplicate": "You already sent that message",
+    "link": "Links are not allowed in this room",
+    "banned_term": "Message contains a blocked word",
+}
+
+_LINK = re.compile(r"(?:https?://|www\.)\S+|\b[\w-]+\.(?:com|net|org|io|gg|ly|me|xyz|ru|br)\b", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+")
+_REPEATS = re.compile(r"(.)\1{2,}")
+
+
+class FilterAutomaton:
+    """Aho-Corasick automaton: finds every banned term in one left-to-right scan.
+
+    Terms are lowercase and match whole words only, so "ass" does not hit
+    "class". `out[state]` holds the lengths of all terms ending at that
+    state, merged along failure links at build time.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, terms: frozenset[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for term in terms:
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (len(term),)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def find(self, text: str) -> list[tuple[int, int]]:
+        """(start, end) spans of whole-word matches in `text`, which must already be lowercase."""
+        goto, fail, out = self._goto, self._fail, self._out
+        spans = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for length in out[state]:
+                    start = end - length
+                    if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                        spans.append((start, end))
+        return spans
+
+
+def _load_terms(path: str) -> frozenset[str]:
+    if not path:
+        return frozenset()
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        logger.exception("Failed to read moderation terms from %s", path)
+        return frozenset()
+    return frozenset(t.strip().lower() for t in lines if t.strip() and not t.startswith("#"))
+
+
+GLOBAL_TERMS = _load_terms(MODERATION_TERMS_FILE)
+
+
+@lru_cache(maxsize=256)
+def compile_filter(room_terms: frozenset[str]) -> FilterAutomaton:
+    """Shared automaton for the global list plus a room's terms; rooms with the same rules reuse it."""
+    return FilterAutomaton(GLOBAL_TERMS | room_terms)
+
+
+def _fold(text: str) -> str:
+    folded = text.lower()
+    if len(folded) != len(text):
+        # A few characters expand when lowercased; keep offsets aligned with the original
+        folded = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    return folded
+
+
+class ModerationStats:
+    """Process-wide counters and per-message cost of the moderation stage."""
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.batches = 0
+        self.masked = 0
+        self.blocked: dict[str, int] = {}
+        self.total_ns = 0
+        self.max_ns = 0
+        self._recent: deque[int] = deque(maxlen=1024)  # per-message ns of recent batches
+
+    def record(self, count: int, elapsed_ns: int) -> None:
+        per_message = elapsed_ns // count
+        self.messages += count
+        self.batches += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, per_message)
+        self._recent.append(per_message)
+
+    def report(self) -> dict[str, Any]:
+        recent = sorted(self._recent)
+        return {
+            "messages": self.messages,
+            "batches": self.batches,
+            "mean_batch_size": self.messages / self.batches if self.batches else 0.0,
+            "masked": self.masked,
+            "blocked": dict(self.blocked),
+            "mean_us": self.total_ns / self.messages / 1000 if self.messages else 0.0,
+            "p99_us": recent[int(0.99 * (len(recent) - 1))] / 1000 if recent else 0.0,
+            "max_us": self.max_ns / 1000,
+        }
+
+
+moderation_stats = ModerationStats()
+
+
+class ChatModerator:
+    """Per-room moderation stage run before chat messages are stored and broadcast.
+
+    Checks, in order: flood rate and repeated messages per user (compared
+    by a hash of the normalized text), links, then banned terms, which are
+    masked, blocked or ignored depending on the room's `chat_filter`.
+    """
+
+    def __init__(self, settings: RoomSettings) -> None:
+        self._history: dict[str, deque[tuple[float, int]]] = {}  # user_id -> (time, text hash)
+        self.rate_limits = True  # off under replay, where wall-clock rates depend on the speed
+        self.update(settings)
+
+    def update(self, settings: RoomSettings) -> None:
+        self.settings = settings
+        self.automaton = compile_filter(frozenset(settings.banned_terms))
+
+    def forget(self, user_id: str) -> None:
+        self._history.pop(user_id, None)
+
+    def _rate_limit(self, user_id: str, text: str, now: float) -> str | None:
+        history = self._history.get(user_id)
+        if history is None:
+            history = self._history[user_id] = deque(maxlen=max(CHAT_FLOOD_MAX_MESSAGES, 2 * CHAT_DUPLICATE_LIMIT))
+        while history and now - history[0][0] > max(CHAT_FLOOD_WINDOW, CHAT_DUPLICATE_WINDOW):
+            history.popleft()
+        if sum(1 for t, _ in history if now - t <= CHAT_FLOOD_WINDOW) >= CHAT_FLOOD_MAX_MESSAGES:
+            return "flood"
+        digest = hash(_REPEATS.sub(r"\1", _NON_WORD.sub("", text.lower())))
+        if sum(1 for t, h in history if h == digest and now - t <= CHAT_DUPLICATE_WINDOW) >= CHAT_DUPLICATE_LIMIT:
+            return "duplicate"
+        history.append((now, digest))
+        return None
+
+    def _check(self, user_id: str, text: str, is_host: bool, now: float) -> tuple[str, str | None]:
+        limited = self.rate_limits and self.settings.flood_protection
+        reason = self._rate_limit(user_id, text, now) if limited else None
+        if reason is None and self.settings.block_links and not is_host and _LINK.search(text):
+            reason = "link"
+        if reason is None and self.settings.chat_filter != "off" and self.automaton:
+            spans = self.automaton.find(_fold(text))
+            if spans and self.settings.chat_filter == "block":
+                reason = "banned_term"
+            elif spans:
+                chars = list(text)
+                for start, end in spans:
+                    chars[start:end] = "*" * (end - start)
+                text = "".join(chars)
+                moderation_stats.masked += 1
+        if reason is not None:
+            moderation_stats.blocked[reason] = moderation_stats.blocked.get(reason, 0) + 1
+        return text, reason
+
+    def check_batch(self, items: list[tuple[str, str, bool]]) -> list[tuple[str, str | None]]:
+        """Moderates a burst of (user_id, text, is_host) in one pass; returns (text, block reason) for each."""
+        t0 = time.perf_counter_ns()
+        now = time.time()
+        results = [self._check(user_id, text, is_host, now) for user_id, text, is_host in items]
+        if items:
+            moderation_stats.record(len(items), time.perf_counter_ns() - t0)
+        return results
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+from typing import Any, Awaitable, TypeVar
+
+from .config import LOOP_STALL_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_PACKAGE_DIR = __file__.rsplit("/", 1)[0]
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{code.co_filename.rsplit('/', 1)[-1]}:{name}"
+
+
+def _innermost_app_frame(frame: FrameType | None) -> str:
+    """Names the deepest frame from this package, e.g. room.py:Room.heartbeat."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PACKAGE_DIR) and filename != __file__:
+            return _frame_label(frame)
+        frame = frame.f_back
+    return "<outside app>"
+
+
+# ── Sampling profiler ────────────────────────────────────────────
+
+
+class SamplingProfiler:
+    """Time-boxed stack sampler for the event loop thread.
+
+    Runs in its own thread and reads the loop thread's current frame, so the
+    loop itself pays nothing. Output is in collapsed-stack format
+    ("a;b;c count"), which flamegraph tools read directly.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, thread_id: int, seconds: float, interval: float) -> dict[str, Any]:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            stacks: Counter[str] = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                if frame is not None:
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stacks[";".join(reversed(labels))] += 1
+                    samples += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+
+        leaves: Counter[str] = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": samples,
+            "interval": interval,
+            "top": [{"frame": f, "samples": n} for f, n in leaves.most_common(25)],
+            "collapsed": "\n".join(f"{s} {n}" for s, n in stacks.most_common()),
+        }
+
+
+# ── Event loop stall detector ────────────────────────────────────
+
+
+class StallDetector:
+    """Logs the loop thread's stack whenever the loop stops ticking for too long.
+
+    A coroutine on the loop stamps a timestamp every threshold/4 seconds; a
+    watchdog thread notices when the stamp goes stale and captures what the
+    loop thread is running at that moment.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.stalls = 0
+        self.worst = 0.0
+        self._last_tick = 0.0
+        self._loop_thread_id: int | None = None
+        self._tick_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self._tick_task is not None
+
+    def start(self) -> None:
+        if self.threshold <= 0 or self.enabled:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._tick_task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Event loop stall detector enabled (threshold %.0f ms)", self.threshold * 1000)
+
+    async def stop(self) -> None:
+        if not self.enabled:
+            return
+        self._stop.set()
+        self._tick_task.cancel()
+        try:
+            await self._tick_task
+        except asyncio.CancelledError:
+            pass
+        self._tick_task = None
+
+    async def _tick(self) -> None:
+        while True:
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.threshold / 4)
+
+    def _watch(self) -> None:
+        reported_tick = 0.0
+        while not self._stop.wait(self.threshold / 4):
+            tick = self._last_tick
+            blocked = time.monotonic() - tick
+            if blocked < self.threshold or tick == reported_tick:
+                continue
+            reported_tick = tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.stalls += 1
+            self.worst = max(self.worst, blocked)
+            logger.warning(
+                "Event loop blocked for %.0f ms in %s\n%s",
+                blocked * 1000,
+                _innermost_app_frame(frame),
+                "".join(traceback.format_stack(frame)),
+            )
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "worst_ms": self.worst * 1000,
+        }
+
+
+# ── Per-room CPU attribution ─────────────────────────────────────
+
+
+class RoomCpuTracker:
+    """Accumulates thread CPU time spent handling each room's work.
+
+    Callers check `enabled` before wrapping, so the disabled path is a
+    single attribute read. Time is measured around awaited handlers; if a
+    handler suspends mid-way, CPU used by other tasks in between is billed
+    to it too, which is rare for the mostly synchronous room handlers.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.since = 0.0
+        self._cpu: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+
+    def start(self) -> None:
+        self._cpu.clear()
+        self._calls.clear()
+        self.since = time.time()
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    async def run(self, room_id: str, awaitable: Awaitable[T]) -> T:
+        t0 = time.thread_time()
+        try:
+            return await awaitable
+        finally:
+            self._cpu[room_id] = self._cpu.get(room_id, 0.0) + time.thread_time() - t0
+            self._calls[room_id] = self._calls.get(room_id, 0) + 1
+
+    def report(self) -> dict[str, Any]:
+        rooms = sorted(self._cpu.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "since": self.since,
+            "rooms": [
+                {"room_id": rid, "cpu_ms": cpu * 1000, "calls": self._calls.get(rid, 0)}
+                for rid, cpu in rooms
+            ],
+        }
+
+
+profiler = SamplingProfiler()
+stall_detector = StallDetector(LOOP_STALL_THRESHOLD)
+room_cpu = RoomCpuTracker()
@@ -0,0 +1,232 @@
+"""Replays a captured traffic trace against a fresh RoomManager.
+
+    python -m app.replay data/traffic/traffic-....ndjson.gz --speed max \\
+        --out run.json --baseline previous.json
+
+--speed takes 1 (real time), any factor N, or "max" (no waiting).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from .chat_history import ChatHistory
+from . import room as room_module
+from .config import CHAT_HISTORY_LIMIT, HEARTBEAT_INTERVAL, HOST_GRACE_PERIOD
+from .message_handler import handle_message
+from .room import Room
+from .room_manager import RoomManager
+from .thumbnails import thumbnail_url
+from .traffic import load_trace
+from .ws_endpoint import join_room, leave_room
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_PLAYLIST_LENGTH = 20  # videos returned per playlist under --offline
+
+
+class FakeWebSocket:
+    """Stands in for a client socket; counts what the server sends it."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_text(self, data: str) -> None:
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        pass
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _latency_stats(samples: list[float]) -> dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "mean_ms": sum(ms) / len(ms) if ms else 0.0,
+        "p50_ms": _percentile(ms, 50),
+        "p95_ms": _percentile(ms, 95),
+        "p99_ms": _percentile(ms, 99),
+        "max_ms": max(ms, default=0.0),
+    }
+
+
+def _new_room(manager: RoomManager) -> Room:
+    """A room whose time-based policies follow the trace clock instead of the wall clock."""
+    room = manager.create_room()
+    room.chat_history = ChatHistory(CHAT_HISTORY_LIMIT)  # keep replays off the real chat log
+    room.realtime = False
+    room.chat_moderator.rate_limits = False
+    room.created_at = 0.0  # rooms are created on first use, so skip the wait-for-first-join grace
+    return room
+
+
+async def replay(events: list[list[Any]], speed: float | None) -> dict[str, Any]:
+    """Drives `events` through the real join/message/leave paths.
+
+    Events are dispatched one at a time in trace order so runs are
+    comparable; `speed=None` dispatches as fast as possible. Heartbeats
+    and host-grace expiries run at their trace offsets rather than on the
+    wall clock, so every speed produces the same sequence of events.
+    """
+    manager = RoomManager()
+    rooms: dict[str, Room] = {}
+    sockets: dict[tuple[str, str], FakeWebSocket] = {}
+    users: dict[tuple[str, str], tuple[str, str]] = {}  # (room, conn) -> (user_id, display_name)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    host_grace: dict[Room, float] = {}  # room -> trace offset at which its absent host is replaced
+    next_beat = HEARTBEAT_INTERVAL
+    skipped = 0
+
+    async def advance(now: float) -> None:
+        """Runs the heartbeats and host-grace expiries due by trace offset `now`, in order."""
+        nonlocal next_beat
+        while True:
+            room, due = min(host_grace.items(), key=lambda item: item[1], default=(None, math.inf))
+            if min(due, next_beat) > now:
+                return
+            if due < next_beat:
+                del host_grace[room]
+                host = room.get_host()
+                if host and not host.connected:
+                    await room._transfer_host()
+                continue
+            next_beat += HEARTBEAT_INTERVAL
+            for room in list(manager._rooms.values()):
+                await room.heartbeat()
+            await manager.cleanup_empty_rooms()
+
+    started = time.perf_counter()
+    for offset, room_id, conn_id, msg in events:
+        if speed:
+            delay = offset / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await advance(offset)
+
+        key = (room_id, conn_id)
+        msg_type = msg.get("type", "")
+        if room_id not in rooms or rooms[room_id].room_id not in manager._rooms:
+            rooms[room_id] = _new_room(manager)
+        room = rooms[room_id]
+
+        t0 = time.perf_counter()
+        if msg_type == "join":
+            ws = sockets[key] = FakeWebSocket()
+            user = await join_room(room, ws, msg.get("display_name", "replay")[:30])
+            users[key] = (user.user_id, user.display_name)
+        elif key not in users:
+            skipped += 1  # connection joined before the capture started
+            continue
+        elif msg_type == "leave":
+            user_id, display_name = users.pop(key)
+            await leave_room(room, user_id, display_name, manager)
+            host = room.get_host()
+            if host and not host.connected:
+                host_grace.setdefault(room, offset + HOST_GRACE_PERIOD)
+        else:
+            await handle_message(room, users[key][0], msg)
+        latencies[msg_type].append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for samples in latencies.values() for s in samples]
+    return {
+        "events": len(all_samples),
+        "skipped": skipped,
+        "elapsed_s": elapsed,
+        "throughput_eps": len(all_samples) / elapsed if elapsed else 0.0,
+        "frames_sent": sum(ws.frames for ws in sockets.values()),
+        "bytes_sent": sum(ws.bytes for ws in sockets.values()),
+        "latency": _latency_stats(all_samples),
+        "by_type": {t: _latency_stats(s) for t, s in sorted(latencies.items())},
+    }
+
+
+def _delta(current: float, baseline: float) -> float | None:
+    if not baseline:
+        return None
+    return (current - baseline) / baseline * 100
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> dict[str, Any]:
+    """Percentage change of throughput and per-type latency against a previous run."""
+    by_type = {}
+    for msg_type, stats in current["by_type"].items():
+        base = baseline.get("by_type", {}).get(msg_type)
+        if base:
+            by_type[msg_type] = {
+                "p50_pct": _delta(stats["p50_ms"], base["p50_ms"]),
+                "p95_pct": _delta(stats["p95_ms"], base["p95_ms"]),
+            }
+    return {
+        "throughput_pct": _delta(current["throughput_eps"], baseline.get("throughput_eps", 0.0)),
+        "p50_pct": _delta(current["latency"]["p50_ms"], baseline["latency"]["p50_ms"]),
+        "p95_pct": _delta(current["latency"]["p95_ms"], baseline["latency"]["p95_ms"]),
+        "by_type": by_type,
+    }
+
+
+async def _offline_playlist(client: Any, playlist_id: str, limit: int) -> list[str]:
+    """Stable made-up video ids, so playlist adds cost the same on every run."""
+    return [f"{playlist_id[-7:]}{i:04d}" for i in range(min(limit, OFFLINE_PLAYLIST_LENGTH))]
+
+
+async def _offline_details(client: Any, video_ids: list[str]) -> dict[str, dict[str, Any]]:
+    return {video_id: {"title": video_id, "duration": 0} for video_id in video_ids}
+
+
+def _parse_speed(value: str) -> float | None:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", type=Path)
+    parser.add_argument("--speed", type=_parse_speed, default=None, help="1, N or 'max' (default)")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON of a previous run to compare against")
+    parser.add_argument("--offline", action="store_true", help="skip oEmbed and YouTube API lookups when adding videos")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.offline:
+        async def _offline_meta(youtube_id: str) -> tuple[str, str]:
+            return youtube_id, thumbnail_url(youtube_id)
+        Room._fetch_video_meta = staticmethod(_offline_meta)
+        room_module.YOUTUBE_API_KEY = room_module.YOUTUBE_API_KEY or "offline"
+        room_module.fetch_playlist_video_ids = _offline_playlist
+        room_module.fetch_video_details = _offline_details
+
+    results = asyncio.run(replay(load_trace(args.trace), args.speed))
+    results["trace"] = str(args.trace)
+    results["speed"] = args.speed or "max"
+    if args.baseline:
+        results["comparison"] = compare(results, json.loads(args.baseline.read_text()))
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,42 @@ from __future__ import annotations
 import asyncio
 import html
 import logging
+import math
 import time
-from collections import deque
 from typing import Any
 
 import httpx
 
-from .config import CHAT_HISTORY_LIMIT, HOST_GRACE_PERIOD, MAX_MESSAGE_LENGTH
+from .config import (
+    CHAT_HISTORY_LIMIT,
+    CHAT_LOG_DIR,
+    CHAT_MAX_PAGE_SIZE,
+    CHAT_PAGE_SIZE,
+    HOST_GRACE_PERIOD,
+    MAX_MESSAGE_LENGTH,
+    MODERATION_MAX_ROOM_TERMS,
+    PRELOAD_LEAD_TIME,
+    READY_QUORUM,
+    READY_TIMEOUT,
+    YOUTUBE_API_KEY,
+)
+from .analytics import analytics
+from .chat_history import ChatHistory
 from .connection_manager import ConnectionManager
+from .media_library import media_library
+from .memory import deep_sizeof, shared_strings
 from .models import ChatMessage, RoomSettings, SyncState, User, UserRole, Video
-from .utils import detect_video_url, extract_youtube_id, generate_user_id, generate_video_id
+from .moderation import BLOCK_MESSAGES, ChatModerator
+from .search_index import search_index
+from .thumbnails import poster_url, thumbnail_url
+from .utils import (
+    detect_video_url,
+    extract_youtube_id,
+    extract_youtube_playlist_id,
+    generate_user_id,
+    generate_video_id,
+)
+from .youtube_api import UNKNOWN_TITLE, YouTubeAPIError, fetch_playlist_video_ids, fetch_video_details
 
 logger = logging.getLogger(__name__)
 
@@ -24,19 +50,31 @@ class Room:
         self.queue: list[Video] = []
         self.sync = SyncState()
         self.settings = RoomSettings()
-        self.chat_history: deque[ChatMessage] = deque(maxlen=CHAT_HISTORY_LIMIT)
+        self.chat_history = ChatHistory(CHAT_HISTORY_LIMIT, CHAT_LOG_DIR / room_id)
+        self.chat_moderator = ChatModerator(self.settings)
+        self._chat_burst: list[tuple[str, str, asyncio.Future]] = []
+        self._chat_flush_task: asyncio.Task | None = None
         self.skip_votes: set[str] = set()
         self.connections = ConnectionManager()
         self.created_at = time.time()
+        self.last_active = self.created_at
+        # Off under replay, which advances its own clock: no host grace timer or ready gate
+        self.realtime = True
         self._host_grace_task: asyncio.Task | None = None
+        self._preloaded_video_id: str | None = None
+        self._preload_ready: set[str] = set()  # users that buffered the announced next video
+        self._ready_capable: set[str] = set()  # users whose client sends ready reports
+        self._ready_users: set[str] = set()
+        self._ready_gate_task: asyncio.Task | None = None
 
     # ── User Management ──────────────────────────────────────────
 
     def add_user(self, display_name: str) -> User:
         user_id = generate_user_id()
-        role = UserRole.HOST if not self.users else UserRole.VIEWER
+        role = UserRole.HOST if self.get_host() is None else UserRole.VIEWER
         user = User(user_id=user_id, display_name=display_name, role=role)
         self.users[user_id] = user
+        self.last_active = time.time()
         return user
 
     def reconnect_user(self, user_id: str) -> User | None:
@@ -44,6 +82,7 @@ class Room:
         if user and not user.connected:
             user.connected = True
             user.disconnected_at = None
+            self.last_active = time.time()
             return user
         return None
 
@@ -54,6 +93,7 @@ class Room:
         user.connected = False
         user.disconnected_at = time.time()
         self.connections.remove(user_id)
+        self.last_active = user.disconnected_at
 
         if user.role == UserRole.HOST:
             self._start_host_grace_period()
@@ -69,6 +109,8 @@ class Room:
         if not self._user_has_queue_items(user_id):
             del self.users[user_id]
             self.skip_votes.discard(user_id)
+            self._ready_capable.discard(user_id)
+            self.chat_moderator.forget(user_id)
             return True
         return False
 
@@ -90,6 +132,8 @@ class Room:
     # ── Host Grace Period ────────────────────────────────────────
 
     def _start_host_grace_period(self) -> None:
+        if not self.realtime:
+            return
         if self._host_grace_task and not self._host_grace_task.done():
             return
         self._host_grace_task = asyncio.create_task(self._host_grace_timer())
@@ -120,12 +164,7 @@ class Room:
             "new_host_name": new_host.display_name,
         })
         # System chat message
-        msg = ChatMessage(
-            user_id="system",
-            display_name="Sistema",
-            message=f"{new_host.display_name} agora é o host.",
-            is_system=True,
-        )
+        msg = ChatMessage.system(f"{new_host.display_name} agora é o host.")
         self.chat_history.append(msg)
         await self.connections.broadcast_all({
             "type": "chat_message",
@@ -149,6 +188,7 @@ class Room:
 
         if youtube_id:
             title, thumbnail = await self._fetch_video_meta(youtube_id)
+            await search_index.record_queued(youtube_id, None if title == UNKNOWN_TITLE else title)
             video = Video(
                 video_id=generate_video_id(),
                 youtube_id=youtube_id,
@@ -159,13 +199,14 @@ class Room:
                 video_type="youtube",
             )
         elif direct_url:
-            title = self._title_from_url(direct_url)
+            entry = media_library.lookup_url(direct_url)
+            title = entry.title if entry else self._title_from_url(direct_url)
             video = Video(
                 video_id=generate_video_id(),
                 youtube_id="",
                 title=title,
-                thumbnail="",
-                duration=0.0,
+                thumbnail=poster_url(entry.path) if entry else "",
+                duration=entry.duration if entry else 0.0,
                 added_by=user_id,
                 video_type="direct",
                 url=direct_url,
@@ -174,6 +215,8 @@ class Room:
             return {"type": "error", "code": "invalid_url", "message": "URL inválida. Cole um link do YouTube ou um link direto de vídeo (.mp4, .webm, etc.)"}
 
         self.queue.append(video)
+        analytics.publish("queue_add", self.room_id, user_id=user_id, video_type=video.video_type,
+                          youtube_id=video.youtube_id or None, count=1)
 
         was_empty = self.sync.current_video_id is None
         if was_empty:
@@ -191,6 +234,70 @@ class Room:
 
         return None
 
+    async def add_playlist(self, user_id: str, url: str) -> dict[str, Any] | None:
+        playlist_id = extract_youtube_playlist_id(url)
+        if not playlist_id:
+            return {"type": "error", "code": "invalid_url", "message": "Link de playlist do YouTube inválido."}
+        if not YOUTUBE_API_KEY:
+            return {"type": "error", "code": "playlist_unavailable", "message": "YouTube API key not configured"}
+
+        user_video_count = sum(1 for v in self.queue if v.added_by == user_id)
+        remaining = self.settings.max_videos_per_user - user_video_count
+        if remaining <= 0:
+            return {"type": "error", "code": "queue_limit", "message": "You've reached the max videos per user"}
+
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                youtube_ids = await fetch_playlist_video_ids(client, playlist_id, remaining)
+                details = await fetch_video_details(client, youtube_ids)
+        except (httpx.HTTPError, YouTubeAPIError):
+            logger.warning("Failed to expand playlist %s", playlist_id, exc_info=True)
+            return {"type": "error", "code": "playlist_failed", "message": "Não foi possível carregar a playlist."}
+
+        videos = []
+        for youtube_id in youtube_ids:
+            meta = details.get(youtube_id)
+            if not meta:
+                continue
+            videos.append(Video(
+                video_id=generate_video_id(),
+                youtube_id=youtube_id,
+                title=meta["title"],
+                thumbnail=thumbnail_url(youtube_id),
+                duration=meta["duration"],
+                added_by=user_id,
+                video_type="youtube",
+            ))
+            await search_index.record_queued(youtube_id, None if meta["title"] == UNKNOWN_TITLE else meta["title"])
+        if not videos:
+            return {"type": "error", "code": "playlist_empty", "message": "A playlist está vazia ou indisponível."}
+
+        # Re-check: other adds may have landed while the API calls were in flight
+        user_video_count = sum(1 for v in self.queue if v.added_by == user_id)
+        videos = videos[:max(0, self.settings.max_videos_per_user - user_video_count)]
+        if not videos:
+            return {"type": "error", "code": "queue_limit", "message": "You've reached the max videos per user"}
+
+        self.queue.extend(videos)
+        analytics.publish("queue_add", self.room_id, user_id=user_id, video_type="youtube",
+                          playlist_id=playlist_id, count=len(videos))
+
+        was_empty = self.sync.current_video_id is None
+        if was_empty:
+            self._set_current_video(videos[0])
+
+        await self.connections.broadcast_all({
+            "type": "queue_updated",
+            "queue": [v.to_dict() for v in self.queue],
+            "action": "add_playlist",
+            "videos": [v.to_dict() for v in videos],
+        })
+
+        if was_empty:
+            await self._broadcast_sync()
+
+        return None
+
     def remove_video(self, user_id: str, video_id: str) -> str | None:
         user = self.users.get(user_id)
         video = next((v for v in self.queue if v.video_id == video_id), None)
@@ -219,7 +326,8 @@ class Room:
         self.queue = [id_map[vid] for vid in video_ids]
         return None
 
-    def _set_current_video(self, video: Video) -> None:
+    def _set_current_video(self, video: Video, wait_for_ready: bool = False) -> None:
+        self._cancel_ready_gate()
         self.sync.current_video_id = video.video_id
         self.sync.youtube_id = video.youtube_id
         self.sync.video_type = video.video_type
@@ -228,9 +336,31 @@ class Room:
         self.sync.is_playing = True
         self.sync.last_updated = time.time()
         self.skip_votes.clear()
+        analytics.publish("play", self.room_id, video_id=video.video_id, video_type=video.video_type,
+                          youtube_id=video.youtube_id or None, duration=video.duration)
+        if not wait_for_ready or not self.realtime or len(self._ready_voters()) < 2:
+            return
+        if video.video_id == self._preloaded_video_id:
+            self._ready_users = self._preload_ready & self._ready_voters()
+        if len(self._ready_users) < self._ready_quorum():
+            # Hold at 0 until enough clients have buffered the new video
+            self.sync.is_playing = False
+            self._ready_gate_task = asyncio.create_task(self._ready_gate_timer())
+        else:
+            self._ready_users.clear()
+
+    def _current_video(self) -> Video | None:
+        return next((v for v in self.queue if v.video_id == self.sync.current_video_id), None)
+
+    def _next_video(self) -> Video | None:
+        for i, v in enumerate(self.queue):
+            if v.video_id == self.sync.current_video_id:
+                return self.queue[i + 1] if i + 1 < len(self.queue) else None
+        return None
 
     async def advance_queue(self) -> None:
         if not self.queue:
+            self._cancel_ready_gate()
             self.sync = SyncState()
             await self._broadcast_sync()
             return
@@ -247,8 +377,9 @@ class Room:
             self.check_user_cleanup(removed.added_by)
 
         if self.queue:
-            self._set_current_video(self.queue[0])
+            self._set_current_video(self.queue[0], wait_for_ready=True)
         else:
+            self._cancel_ready_gate()
             self.sync = SyncState()
 
         await self.connections.broadcast_all({
@@ -265,6 +396,8 @@ class Room:
             return "Only the host can control playback"
         if not self.sync.current_video_id:
             return "No video playing"
+        if self._ready_gate_task is not None:
+            return None  # the ready gate starts playback; the host's own autoplay must not skip it
         self.sync.is_playing = True
         self.sync.last_updated = time.time()
         return None
@@ -292,6 +425,88 @@ class Room:
         user = self.users.get(user_id)
         return user is not None and user.role == UserRole.HOST
 
+    # ── Preload / Ready Gate ─────────────────────────────────────
+
+    async def _maybe_send_preload(self) -> None:
+        next_video = self._next_video()
+        if not next_video or next_video.video_id == self._preloaded_video_id:
+            return
+        current = self._current_video()
+        if not current or current.duration <= 0 or not self.sync.is_playing:
+            return
+        remaining = current.duration - self.sync.current_server_time()
+        if remaining > PRELOAD_LEAD_TIME:
+            return
+        self._preloaded_video_id = next_video.video_id
+        self._preload_ready.clear()
+        await self.connections.broadcast_all({
+            "type": "preload",
+            "video": next_video.to_dict(),
+            "starts_in": max(0.0, remaining),
+        })
+
+    def _ready_voters(self) -> set[str]:
+        """Connected users whose client reports readiness; older clients never hold playback."""
+        return {u.user_id for u in self._connected_users() if u.user_id in self._ready_capable}
+
+    def _ready_quorum(self) -> int:
+        return max(1, math.ceil(len(self._ready_voters()) * READY_QUORUM))
+
+    async def handle_sync_report(self, user_id: str, data: dict[str, Any]) -> None:
+        if data.get("state") == "ready":
+            await self._handle_ready(user_id, data.get("video_id"))
+            return
+
+        current = self._current_video()
+        if not current or data.get("video_id", current.video_id) != current.video_id:
+            return
+
+        timestamp = data.get("timestamp")
+        if isinstance(timestamp, (int, float)) and self.sync.is_playing:
+            analytics.publish("drift", self.room_id, user_id=user_id, video_id=current.video_id,
+                              drift=round(timestamp - self.sync.current_server_time(), 3))
+
+        duration = data.get("duration")
+        # Only trust a duration reported for this exact video, not one the client just left
+        if "video_id" not in data:
+            return
+        if not current.duration and isinstance(duration, (int, float)) and duration > 0:
+            current.duration = float(duration)
+
+    async def _handle_ready(self, user_id: str, video_id: Any) -> None:
+        if not isinstance(video_id, str):
+            return
+        self._ready_capable.add(user_id)
+        if video_id != self.sync.current_video_id:
+            if video_id == self._preloaded_video_id:
+                self._preload_ready.add(user_id)
+            return
+        if self._ready_gate_task is None:
+            return
+        self._ready_users.add(user_id)
+        if len(self._ready_users & self._ready_voters()) >= self._ready_quorum():
+            await self._release_ready_gate()
+
+    async def _ready_gate_timer(self) -> None:
+        await asyncio.sleep(READY_TIMEOUT)
+        self._ready_gate_task = None
+        await self._release_ready_gate()
+
+    async def _release_ready_gate(self) -> None:
+        self._cancel_ready_gate()
+        if not self.sync.current_video_id:
+            return
+        self.sync.timestamp = 0.0
+        self.sync.is_playing = True
+        self.sync.last_updated = time.time()
+        await self._broadcast_sync()
+
+    def _cancel_ready_gate(self) -> None:
+        if self._ready_gate_task and not self._ready_gate_task.done():
+            self._ready_gate_task.cancel()
+        self._ready_gate_task = None
+        self._ready_users.clear()
+
     # ── Skip Voting ──────────────────────────────────────────────
 
     async def handle_skip_vote(self, user_id: str, video_id: str) -> None:
@@ -305,6 +520,8 @@ class Room:
         # Host or video requester = instant skip
         current_video = next((v for v in self.queue if v.video_id == video_id), None)
         if user.role == UserRole.HOST or (current_video and current_video.added_by == user_id):
+            analytics.publish("skip", self.room_id, video_id=video_id, user_id=user_id,
+                              by="host" if user.role == UserRole.HOST else "requester")
             await self.advance_queue()
             return
 
@@ -321,6 +538,8 @@ class Room:
         })
 
         if len(self.skip_votes) >= required:
+            analytics.publish("skip", self.room_id, video_id=video_id, user_id=user_id, by="vote",
+                              votes=len(self.skip_votes), required=required)
             await self.advance_queue()
 
     # ── Chat ─────────────────────────────────────────────────────
@@ -330,27 +549,72 @@ class Room:
         if not user:
             return "Unknown user"
 
-        clean = html.escape(message.strip()[:MAX_MESSAGE_LENGTH])
-        if not clean:
+        text = message.strip()[:MAX_MESSAGE_LENGTH] if isinstance(message, str) else ""
+        if not text:
             return "Empty message"
 
-        msg = ChatMessage(
-            user_id=user_id,
-            display_name=user.display_name,
-            message=clean,
-        )
-        self.chat_history.append(msg)
-        await self.connections.broadcast_all({
-            "type": "chat_message",
-            **msg.to_dict(),
-        })
-        return None
+        # Messages arriving in the same loop iteration are moderated and sent as one burst
+        future = asyncio.get_running_loop().create_future()
+        self._chat_burst.append((user_id, text, future))
+        if len(self._chat_burst) == 1:
+            self._chat_flush_task = asyncio.create_task(self._flush_chat_burst())
+        return await future
+
+    async def _flush_chat_burst(self) -> None:
+        burst, self._chat_burst = self._chat_burst, []
+        try:
+            verdicts = self.chat_moderator.check_batch([
+                (user_id, text, self._is_host(user_id)) for user_id, text, _ in burst
+            ])
+        except Exception as exc:
+            for _, _, future in burst:
+                _resolve(future, exception=exc)
+            return
+        accepted = []
+        for (user_id, _, future), (text, reason) in zip(burst, verdicts):
+            user = self.users.get(user_id)
+            if reason is not None or user is None:
+                _resolve(future, BLOCK_MESSAGES.get(reason, "Unknown user"))
+                continue
+            msg = ChatMessage(user_id=user_id, display_name=user.display_name, message=html.escape(text))
+            self.chat_history.append(msg)
+            accepted.append((msg, future))
+        # A sender whose task was cancelled still has its message delivered; only its own future is skipped
+        for msg, future in accepted:
+            try:
+                await self.connections.broadcast_all({
+                    "type": "chat_message",
+                    **msg.to_dict(),
+                })
+            except Exception as exc:
+                _resolve(future, exception=exc)
+            else:
+                _resolve(future, None)
+
+    async def get_chat_page(self, before: Any, limit: Any) -> dict[str, Any]:
+        if not isinstance(before, int) or isinstance(before, bool):
+            before = self.chat_history.next_seq
+        if not isinstance(limit, int) or isinstance(limit, bool):
+            limit = CHAT_PAGE_SIZE
+        limit = max(1, min(limit, CHAT_MAX_PAGE_SIZE))
+        messages, has_more = await self.chat_history.page(before, limit)
+        return {
+            "type": "chat_history_page",
+            "before": before,
+            "messages": [m.to_dict() for m in messages],
+            "has_more": has_more,
+        }
 
     # ── Settings ─────────────────────────────────────────────────
 
     async def update_settings(self, user_id: str, settings: dict) -> str | None:
         if not self._is_host(user_id):
             return "Only the host can change settings"
+        if not isinstance(settings, dict):
+            return "Invalid settings"
+        terms = settings.get("banned_terms")
+        if isinstance(terms, list) and len(terms) > MODERATION_MAX_ROOM_TERMS:
+            return f"At most {MODERATION_MAX_ROOM_TERMS} banned terms per room"
         if "max_videos_per_user" in settings:
             val = settings["max_videos_per_user"]
             if isinstance(val, int) and 1 <= val <= 50:
@@ -359,6 +623,18 @@ class Room:
             val = settings["skip_vote_threshold"]
             if isinstance(val, (int, float)) and 0.1 <= val <= 1.0:
                 self.settings.skip_vote_threshold = float(val)
+        if settings.get("chat_filter") in ("off", "mask", "block"):
+            self.settings.chat_filter = settings["chat_filter"]
+        for key in ("block_links", "flood_protection"):
+            if isinstance(settings.get(key), bool):
+                setattr(self.settings, key, settings[key])
+        if isinstance(settings.get("banned_terms"), list):
+            terms = {
+                t.strip().lower() for t in settings["banned_terms"]
+                if isinstance(t, str) and 0 < len(t.strip()) <= 50
+            }
+            self.settings.banned_terms = sorted(terms)
+        self.chat_moderator.update(self.settings)
         await self.connections.broadcast_all({
             "type": "settings_updated",
             "settings": self.settings.to_dict(),
@@ -375,13 +651,15 @@ class Room:
         })
 
     async def heartbeat(self) -> None:
-        if self.connections.count > 0:
+        if self.connections.count > 0 or self.connections.spectators.count > 0:
+            await self._maybe_send_preload()
             await self._broadcast_sync()
 
     # ── Room State Snapshot ──────────────────────────────────────
 
-    def get_full_state(self, user_id: str) -> dict[str, Any]:
+    def get_full_state(self, user_id: str | None) -> dict[str, Any]:
         user = self.users.get(user_id)
+        chat = self.chat_history.latest(CHAT_PAGE_SIZE)
         return {
             "type": "room_state",
             "room_id": self.room_id,
@@ -389,16 +667,130 @@ class Room:
             "queue": [v.to_dict() for v in self.queue],
             "sync": self.sync.to_dict(),
             "settings": self.settings.to_dict(),
-            "chat_history": [m.to_dict() for m in self.chat_history],
+            "chat_history": [m.to_dict() for m in chat],
+            "chat_has_more": bool(chat) and chat[0].seq > self.chat_history.oldest_seq,
             "your_user_id": user_id,
             "your_role": user.role.value if user else "viewer",
             "server_time": time.time(),
         }
 
+    # ── Hibernation ──────────────────────────────────────────────
+
+    def is_idle_for(self, seconds: float) -> bool:
+        if self.connections.count > 0 or self.connections.spectators.count > 0:
+            return False
+        return (time.time() - self.last_active) > seconds
+
+    def to_snapshot(self) -> dict[str, Any]:
+        """Compact, JSON-serializable state used to evict idle rooms from memory
+        and to hand live rooms to a new process on restart.
+        """
+        return {
+            "v": 1,
+            "room_id": self.room_id,
+            "created_at": self.created_at,
+            "saved_at": time.time(),
+            "users": [
+                [u.user_id, u.display_name, u.role.value]
+                for u in self.users.values()
+            ],
+            "queue": [
+                [v.video_id, v.youtube_id, v.title, v.thumbnail, v.duration, v.added_by, v.video_type, v.url]
+                for v in self.queue
+            ],
+            "sync": [
+                self.sync.current_video_id,
+                self.sync.youtube_id,
+                self.sync.current_server_time(),
+                self.sync.video_type,
+                self.sync.url,
+            ],
+            "playing": self.sync.is_playing,
+            "settings": self.settings.to_dict(),
+            "chat": self.chat_history.records(),
+            "chat_next_seq": self.chat_history.next_seq,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict[str, Any], live: bool = False) -> Room:
+        """Rebuilds a room from `to_snapshot()`.
+
+        A hibernated room comes back paused with nobody as host. A `live`
+        room (handed over by a restarting process) keeps roles and playback,
+        and counts as freshly created so it survives until clients reconnect.
+        """
+        room = cls(data["room_id"])
+        if not live:
+            room.created_at = data["created_at"]
+        for user_id, display_name, role in data["users"]:
+            # After hibernation everyone left long ago; the first person to come back becomes host.
+            room.users[user_id] = User(
+                user_id=user_id,
+                display_name=display_name,
+                role=UserRole(role) if live else UserRole.VIEWER,
+                connected=False,
+                disconnected_at=room.last_active,
+            )
+        room.queue = [
+            Video(
+                video_id=vid, youtube_id=ytid, title=title, thumbnail=thumb,
+                duration=duration, added_by=added_by, video_type=vtype, url=url,
+            )
+            for vid, ytid, title, thumb, duration, added_by, vtype, url in data["queue"]
+        ]
+        current_video_id, youtube_id, timestamp, video_type, url = data["sync"]
+        room.sync = SyncState(
+            current_video_id=current_video_id,
+            youtube_id=youtube_id,
+            timestamp=timestamp,
+            is_playing=live and data.get("playing", False),
+            last_updated=data.get("saved_at", time.time()) if live else time.time(),
+            video_type=video_type,
+            url=url,
+        )
+        room.settings = RoomSettings(**data["settings"])
+        room.chat_moderator.update(room.settings)
+        room.chat_history.restore(data["chat"], data["chat_next_seq"])
+        if live and room.get_host():
+            room._start_host_grace_period()
+        return room
+
+    def close(self) -> None:
+        """Cancels background timers and ends spectator streams before the room is dropped from memory."""
+        self._cancel_ready_gate()
+        self.connections.spectators.close()
+        if self._host_grace_task and not self._host_grace_task.done():
+            self._host_grace_task.cancel()
+        self._host_grace_task = None
+
+    # ── Memory Accounting ────────────────────────────────────────
+
+    def memory_usage(self, seen: set[int] | None = None) -> dict[str, Any]:
+        """Approximate bytes retained by this room, per subsystem and per connection."""
+        seen = shared_strings() if seen is None else seen
+        subsystems = {
+            "users": deep_sizeof(self.users, seen),
+            "queue": deep_sizeof(self.queue, seen),
+            "chat": deep_sizeof(self.chat_history, seen),
+            "sync": deep_sizeof(self.sync, seen) + deep_sizeof(self.settings, seen),
+            "skip_votes": deep_sizeof(self.skip_votes, seen),
+        }
+        connections = {
+            uid: deep_sizeof(ws, seen) + deep_sizeof(getattr(ws, "scope", None), seen)
+            for uid, ws in self.connections.connections.items()
+        }
+        subsystems["connections"] = deep_sizeof(self.connections, seen) + sum(connections.values())
+        return {
+            "room_id": self.room_id,
+            "total": sum(subsystems.values()),
+            "subsystems": subsystems,
+            "connections": connections,
+        }
+
     # ── Helpers ──────────────────────────────────────────────────
 
     def is_empty(self) -> bool:
-        if self.connections.count > 0 or len(self.queue) > 0:
+        if self.connections.count > 0 or self.connections.spectators.count > 0 or len(self.queue) > 0:
             return False
         # Don't destroy rooms less than 30s old (allow time for first join)
         return (time.time() - self.created_at) > 30
@@ -421,7 +813,17 @@ class Room:
                 resp = await client.get(url)
                 if resp.status_code == 200:
                     data = resp.json()
-                    return data.get("title", "Unknown"), data.get("thumbnail_url", "")
+                    return data.get("title", UNKNOWN_TITLE), thumbnail_url(youtube_id)
         except Exception:
             logger.debug("Failed to fetch oEmbed for %s", youtube_id)
-        return "Unknown Video", f"https://img.youtube.com/vi/{youtube_id}/mqdefault.jpg"
+        return UNKNOWN_TITLE, thumbnail_url(youtube_id)
+
+
+def _resolve(future: asyncio.Future, result: Any = None, exception: BaseException | None = None) -> None:
+    """Settles a chat sender's future unless its task has already gone away."""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
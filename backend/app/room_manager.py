@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from typing import Any
 
+from .config import ROOM_HIBERNATE_AFTER
 from .room import Room
+from .room_store import RoomStore, room_store
 from .utils import generate_room_id
 
 logger = logging.getLogger(__name__)
@@ -11,34 +15,126 @@ logger = logging.getLogger(__name__)
 class RoomManager:
     """Singleton that tracks all active rooms."""
 
-    def __init__(self) -> None:
+    def __init__(self, store: RoomStore | None = None) -> None:
         self._rooms: dict[str, Room] = {}
+        self._store = store
+        self._hibernating: dict[str, dict[str, Any]] = {}  # room_id -> snapshot being written
+        self._stored: set[str] = set()  # room ids with a snapshot in the store
+        self._loading: dict[str, asyncio.Task] = {}  # room_id -> snapshot being read back
 
     def create_room(self) -> Room:
         room_id = generate_room_id()
-        while room_id in self._rooms:
+        while room_id in self._rooms or self._is_hibernated(room_id):
             room_id = generate_room_id()
         room = Room(room_id)
         self._rooms[room_id] = room
         logger.info("Room created: %s", room_id)
         return room
 
-    def get_room(self, room_id: str) -> Room | None:
-        return self._rooms.get(room_id)
+    async def get_room(self, room_id: str) -> Room | None:
+        room = self._rooms.get(room_id)
+        if room is None and self._store is not None:
+            room = await self._rehydrate(room_id)
+        return room
 
-    def remove_room(self, room_id: str) -> None:
+    async def remove_room(self, room_id: str) -> None:
         if room_id in self._rooms:
-            del self._rooms[room_id]
+            room = self._rooms.pop(room_id)
+            room.close()
             logger.info("Room destroyed: %s", room_id)
+            await room.chat_history.discard()
 
-    def cleanup_empty_rooms(self) -> None:
+    async def cleanup_empty_rooms(self) -> None:
         empty = [rid for rid, room in self._rooms.items() if room.is_empty()]
         for rid in empty:
-            self.remove_room(rid)
+            # Removing an earlier room awaits its chat log deletion; this one may have been joined since
+            room = self._rooms.get(rid)
+            if room is not None and room.is_empty():
+                await self.remove_room(rid)
+
+    def adopt_room(self, room: Room) -> None:
+        """Registers a room handed over by another process."""
+        self._rooms.setdefault(room.room_id, room)
+
+    def detach_room(self, room_id: str) -> Room | None:
+        """Forgets a room that now lives in another process, leaving its on-disk log alone."""
+        room = self._rooms.pop(room_id, None)
+        if room is not None:
+            room.close()
+            room.chat_history.directory = None
+        return room
 
     @property
     def room_count(self) -> int:
         return len(self._rooms)
 
+    # ── Hibernation ──────────────────────────────────────────────
+
+    async def load_hibernated(self) -> None:
+        """Reads the ids of stored rooms once at startup, so lookups never touch the disk."""
+        if self._store is not None:
+            self._stored = await asyncio.to_thread(self._store.room_ids)
+
+    def _is_hibernated(self, room_id: str) -> bool:
+        return room_id in self._hibernating or room_id in self._stored or room_id in self._loading
+
+    async def hibernate_idle_rooms(self) -> None:
+        """Evicts rooms without connections for ROOM_HIBERNATE_AFTER seconds to the store."""
+        if self._store is None:
+            return
+        idle = [rid for rid, room in self._rooms.items() if room.is_idle_for(ROOM_HIBERNATE_AFTER)]
+        for rid in idle:
+            room = self._rooms.get(rid)
+            # Earlier rooms' awaits may have let a join (or a removal) in since the list was built
+            if room is None or not room.is_idle_for(ROOM_HIBERNATE_AFTER):
+                continue
+            del self._rooms[rid]
+            room.close()
+            # Register the snapshot before yielding so get_room can rehydrate from it meanwhile
+            snapshot = room.to_snapshot()
+            self._hibernating[rid] = snapshot
+            await room.chat_history.flush()
+            if rid not in self._hibernating:
+                continue  # already rehydrated during the flush
+            try:
+                await asyncio.to_thread(self._store.save, snapshot)
+            except OSError:
+                logger.exception("Failed to hibernate room %s; keeping it in memory", rid)
+                if self._hibernating.pop(rid, None) is not None:
+                    self._rooms[rid] = Room.from_snapshot(snapshot)
+                continue
+            if self._hibernating.pop(rid, None) is None:
+                # Rehydrated from the pending snapshot while we were writing
+                await asyncio.to_thread(self._store.delete, rid)
+                continue
+            self._stored.add(rid)
+            logger.info("Room hibernated: %s", rid)
+
+    async def _rehydrate(self, room_id: str) -> Room | None:
+        snapshot = self._hibernating.pop(room_id, None)
+        if snapshot is not None:
+            return self._restore(snapshot)
+        task = self._loading.get(room_id)
+        if task is None:
+            if room_id not in self._stored:
+                return None
+            # One read per room; concurrent joins wait for the same one
+            self._stored.discard(room_id)
+            task = self._loading[room_id] = asyncio.create_task(self._load(room_id))
+        return await asyncio.shield(task)
+
+    async def _load(self, room_id: str) -> Room | None:
+        try:
+            snapshot = await asyncio.to_thread(self._store.take, room_id)
+        finally:
+            del self._loading[room_id]
+        return self._restore(snapshot) if snapshot is not None else None
+
+    def _restore(self, snapshot: dict[str, Any]) -> Room:
+        room = Room.from_snapshot(snapshot)
+        self._rooms[room.room_id] = room
+        logger.info("Room rehydrated: %s", room.room_id)
+        return room
+
 
-room_manager = RoomManager()
+room_manager = RoomManager(room_store)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+from .config import CHAT_LOG_DIR, ROOM_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class RoomStore:
+    """On-disk store for hibernated rooms: one gzipped JSON snapshot per room.
+
+    `chat_directory` holds each room's chat log (one subdirectory per room),
+    which is pruned along with the snapshots.
+    """
+
+    def __init__(self, directory: Path, chat_directory: Path | None = None) -> None:
+        self.directory = directory
+        self.chat_directory = chat_directory
+
+    def _path(self, room_id: str) -> Path:
+        return self.directory / f"{room_id}.json.gz"
+
+    def exists(self, room_id: str) -> bool:
+        return self._path(room_id).exists()
+
+    def room_ids(self) -> set[str]:
+        if not self.directory.is_dir():
+            return set()
+        return {path.name.removesuffix(".json.gz") for path in self.directory.glob("*.json.gz")}
+
+    def save(self, snapshot: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(snapshot["room_id"])
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def load(self, room_id: str) -> dict[str, Any] | None:
+        try:
+            with gzip.open(self._path(room_id), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Discarding unreadable snapshot for room %s", room_id)
+            self.delete(room_id)
+            return None
+
+    def take(self, room_id: str) -> dict[str, Any] | None:
+        """Loads a snapshot and removes it from the store."""
+        snapshot = self.load(room_id)
+        if snapshot is not None:
+            self.delete(room_id)
+        return snapshot
+
+    def delete(self, room_id: str) -> None:
+        try:
+            self._path(room_id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_age: float) -> int:
+        """Deletes snapshots older than `max_age` seconds and their chat logs.
+
+        Chat logs with no snapshot that were untouched for as long (left by
+        a crash) go too. Returns how many snapshots were removed.
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.json.gz"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except OSError:
+                    continue
+        if self.chat_directory is not None and self.chat_directory.is_dir():
+            for path in self.chat_directory.iterdir():
+                try:
+                    if not self.exists(path.name) and path.stat().st_mtime < cutoff:
+                        shutil.rmtree(path)
+                except OSError:
+                    continue
+        return removed
+
+
+room_store = RoomStore(ROOM_STORE_DIR, CHAT_LOG_DIR)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .config import SEARCH_INDEX_PATH, SEARCH_INDEX_SAVE_INTERVAL, SEARCH_QUERY_CACHE_SIZE, SEARCH_RESULTS_LIMIT
+from .thumbnails import thumbnail_url
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_SPLIT = re.compile(r"[^\w]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Casefolds, strips accents and splits on non-word characters."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [t for t in _TOKEN_SPLIT.split(stripped.casefold()) if t]
+
+
+class SearchIndex:
+    """In-process inverted index over every video seen by search or queued.
+
+    Tokens are kept in a sorted list so prefix lookups are a bisect plus a
+    short scan. Remote query results are also remembered verbatim, since
+    YouTube often returns videos whose titles don't contain the query.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._videos: dict[str, dict[str, Any]] = {}  # youtube_id -> entry
+        self._postings: dict[str, set[str]] = {}  # token -> youtube_ids
+        self._title_tokens: dict[str, frozenset[str]] = {}  # youtube_id -> title tokens, for ranking
+        self._sorted_tokens: list[str] = []
+        self._tokens_dirty = False
+        self._queries: OrderedDict[str, list[str]] = OrderedDict()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+    # ── Loading / persistence ────────────────────────────────────
+
+    def load(self) -> None:
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                data = json.loads(self.path.read_text())
+            except FileNotFoundError:
+                data = {}
+            except (OSError, ValueError):
+                logger.warning("Ignoring unreadable search index %s", self.path)
+                data = {}
+            for youtube_id, entry in data.get("videos", {}).items():
+                self._index_video(youtube_id, entry)
+            for query, ids in data.get("queries", []):
+                self._queries[query] = ids
+            self._loaded = True
+
+    async def ensure_loaded(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            "videos": dict(self._videos),
+            "queries": list(self._queries.items()),
+        }
+
+    def _write(self, snapshot: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, self.path)
+
+    async def save(self, force: bool = False) -> None:
+        if not self._dirty:
+            return
+        if not force and time.time() - self._last_save < SEARCH_INDEX_SAVE_INTERVAL:
+            return
+        self._dirty = False
+        self._last_save = time.time()
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except OSError:
+            self._dirty = True
+            logger.exception("Failed to write search index")
+
+    # ── Indexing ─────────────────────────────────────────────────
+
+    def _index_video(self, youtube_id: str, entry: dict[str, Any]) -> None:
+        old = self._videos.get(youtube_id)
+        if old:
+            entry = {**old, **{k: v for k, v in entry.items() if v}}
+            entry["queue_count"] = max(old.get("queue_count", 0), entry.get("queue_count", 0))
+        self._videos[youtube_id] = entry
+        title_tokens = frozenset(tokenize(entry.get("title", "")))
+        tokens = title_tokens.union(tokenize(entry.get("channel", "")))
+        if old:
+            # Drop postings for words no longer in the title or channel
+            old_tokens = self._title_tokens.get(youtube_id, frozenset()).union(tokenize(old.get("channel", "")))
+            for token in old_tokens - tokens:
+                ids = self._postings.get(token)
+                if ids is not None:
+                    ids.discard(youtube_id)
+                    if not ids:
+                        del self._postings[token]
+                        self._tokens_dirty = True
+        self._title_tokens[youtube_id] = title_tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = ids = set()
+                self._tokens_dirty = True
+            ids.add(youtube_id)
+
+    async def add_results(self, query: str, results: list[dict[str, Any]]) -> None:
+        """Indexes remote search results and remembers them for `query`."""
+        await self.ensure_loaded()
+        for r in results:
+            self._index_video(r["youtube_id"], {
+                "title": r.get("title", ""),
+                "channel": r.get("channel", ""),
+            })
+        key = " ".join(tokenize(query))
+        if key:
+            self._queries[key] = [r["youtube_id"] for r in results]
+            self._queries.move_to_end(key)
+            while len(self._queries) > SEARCH_QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        self._dirty = True
+
+    async def record_queued(self, youtube_id: str, title: str | None) -> None:
+        """Counts a queue add; `title` is None when it could not be fetched, keeping any known title."""
+        await self.ensure_loaded()
+        count = self._videos.get(youtube_id, {}).get("queue_count", 0) + 1
+        self._index_video(youtube_id, {"title": title or "", "queue_count": count})
+        self._dirty = True
+
+    # ── Querying ─────────────────────────────────────────────────
+
+    def _prefix_matches(self, prefix: str) -> set[str]:
+        if self._tokens_dirty:
+            self._sorted_tokens = sorted(self._postings)
+            self._tokens_dirty = False
+        tokens = self._sorted_tokens
+        ids: set[str] = set()
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            ids |= self._postings[tokens[i]]
+            i += 1
+        return ids
+
+    def search(self, query: str, limit: int = SEARCH_RESULTS_LIMIT) -> list[dict[str, Any]]:
+        terms = tokenize(query)
+        if not terms or not self._loaded:
+            return []
+
+        cached = self._queries.get(" ".join(terms))
+        if cached is not None:
+            self._queries.move_to_end(" ".join(terms))
+            return [self._result(vid) for vid in cached[:limit] if vid in self._videos]
+
+        # Every term must match; the last may be a partial word still being typed.
+        candidates: set[str] | None = None
+        last = len(terms) - 1
+        for i, term in enumerate(terms):
+            ids = self._prefix_matches(term) if i == last else self._postings.get(term, set())
+            candidates = ids.copy() if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        def rank(vid: str) -> tuple:
+            entry = self._videos[vid]
+            title_tokens = self._title_tokens[vid]
+            exact = sum(1 for t in terms if t in title_tokens)
+            return (-entry.get("queue_count", 0), -exact, entry.get("title", ""))
+
+        return [self._result(vid) for vid in sorted(candidates, key=rank)[:limit]]
+
+    def _result(self, youtube_id: str) -> dict[str, Any]:
+        entry = self._videos[youtube_id]
+        return {
+            "youtube_id": youtube_id,
+            "title": entry.get("title", ""),
+            "thumbnail": thumbnail_url(youtube_id),
+            "channel": entry.get("channel", ""),
+        }
+
+
+search_index = SearchIndex(SEARCH_INDEX_PATH)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from typing import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .config import HANDOFF_RECONNECT_JITTER, MAX_SPECTATORS_PER_ROOM, SPECTATOR_KEEPALIVE, SPECTATOR_RETRY_MS
+from .connection_manager import sse_frame
+from .handoff import handoff
+from .room import Room
+from .room_manager import room_manager
+
+router = APIRouter(prefix="/api/rooms")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # tell nginx not to buffer the stream
+}
+
+
+async def _stream(room: Room) -> AsyncIterator[bytes]:
+    feed = room.connections.spectators
+    feed.count += 1
+    try:
+        cursor = feed.cursor
+        yield f"retry: {SPECTATOR_RETRY_MS}\n".encode() + sse_frame("room_state", json.dumps(room.get_full_state(None)))
+        while not feed.closed:
+            frames, cursor = await feed.read(cursor, SPECTATOR_KEEPALIVE)
+            yield b"".join(frames) if frames else b": keepalive\n\n"
+    finally:
+        feed.count -= 1
+        room.last_active = time.time()
+
+
+async def _redirect() -> AsyncIterator[bytes]:
+    # EventSource only retries after a 200 stream ends, so point it back here after a jittered pause.
+    yield f"retry: {random.randint(SPECTATOR_RETRY_MS, SPECTATOR_RETRY_MS + int(HANDOFF_RECONNECT_JITTER * 1000))}\n\n".encode()
+
+
+@router.get("/{room_id}/events")
+async def room_events(room_id: str):
+    """Read-only Server-Sent Events stream of a room's sync, queue and chat broadcasts."""
+    if handoff.draining:
+        return StreamingResponse(_redirect(), media_type="text/event-stream", headers=SSE_HEADERS)
+    room = await room_manager.get_room(room_id)
+    if not room:
+        return JSONResponse(status_code=404, content={"error": "Room not found"})
+    if room.connections.spectators.count >= MAX_SPECTATORS_PER_ROOM:
+        return JSONResponse(status_code=503, content={"error": "Too many spectators"}, headers={"Retry-After": "30"})
+    return StreamingResponse(_stream(room), media_type="text/event-stream", headers=SSE_HEADERS)
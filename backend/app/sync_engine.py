@@ -4,7 +4,9 @@ import asyncio
 import logging
 
 from .config import HEARTBEAT_INTERVAL
+from .profiling import room_cpu
 from .room_manager import room_manager
+from .search_index import search_index
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +17,15 @@ async def heartbeat_loop() -> None:
         try:
             for room in list(room_manager._rooms.values()):
                 try:
-                    await room.heartbeat()
+                    if room_cpu.enabled:
+                        await room_cpu.run(room.room_id, room.heartbeat())
+                    else:
+                        await room.heartbeat()
                 except Exception:
                     logger.exception("Heartbeat error in room %s", room.room_id)
-            room_manager.cleanup_empty_rooms()
+            await room_manager.cleanup_empty_rooms()
+            await room_manager.hibernate_idle_rooms()
+            await search_index.save()  # throttled to SEARCH_INDEX_SAVE_INTERVAL
         except Exception:
             logger.exception("Heartbeat loop error")
         await asyncio.sleep(HEARTBEAT_INTERVAL)
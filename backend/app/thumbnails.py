@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import FileResponse, Response
+
+from .config import (
+    THUMBNAIL_CACHE_DIR,
+    THUMBNAIL_CACHE_MAX_BYTES,
+    THUMBNAIL_MAX_AGE,
+    THUMBNAIL_MISS_TTL,
+    THUMBNAIL_POSTER_WIDTHS,
+    THUMBNAIL_PUBLIC_PATH,
+    THUMBNAIL_UNLINK_DELAY,
+    THUMBNAIL_UPSTREAM,
+    THUMBNAIL_VARIANTS,
+)
+from .media_library import media_library
+
+logger = logging.getLogger(__name__)
+
+_YOUTUBE_ID = re.compile(r"[a-zA-Z0-9_-]{11}")
+
+
+def thumbnail_url(youtube_id: str, size: str = "medium") -> str:
+    return f"{THUMBNAIL_PUBLIC_PATH}/yt/{youtube_id}?size={size}"
+
+
+def poster_url(path: str, size: str = "medium") -> str:
+    return f"{THUMBNAIL_PUBLIC_PATH}/local/{quote(path)}?size={size}"
+
+
+class ThumbnailCache:
+    """Content-addressed image files on disk with LRU eviction by total size.
+
+    Keys ("yt/<id>/<size>", "local/<path>/<mtime>/<size>") map to the
+    sha256 of the image, so identical images (e.g. YouTube's placeholder)
+    are stored once and the hash doubles as a strong ETag. Concurrent
+    misses for the same key share one upstream fetch, and a key whose
+    producer returned nothing is not retried for THUMBNAIL_MISS_TTL.
+    Evicted files are unlinked after THUMBNAIL_UNLINK_DELAY so responses
+    already streaming them can finish.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._keys: dict[str, str] = {}  # key -> digest
+        self._files: OrderedDict[str, int] = OrderedDict()  # digest -> size, LRU order
+        self._total = 0
+        self._load_task: asyncio.Task | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._misses: OrderedDict[str, float] = OrderedDict()  # key -> monotonic expiry, oldest first
+        self._save_task: asyncio.Task | None = None
+        self._unlink_tasks: set[asyncio.Task] = set()
+
+    def _file(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.jpg"
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / "index.json"
+
+    def _read_index(self) -> tuple[OrderedDict[str, int], dict[str, str]]:
+        try:
+            data = json.loads(self._index_path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        files: OrderedDict[str, int] = OrderedDict()
+        for digest, size in data.get("files", []):
+            if self._file(digest).exists():
+                files[digest] = size
+        keys = {k: d for k, d in data.get("keys", {}).items() if d in files}
+        return files, keys
+
+    async def _load(self) -> None:
+        files, keys = await asyncio.to_thread(self._read_index)
+        self._files, self._keys = files, keys
+        self._total = sum(files.values())
+
+    def _save(self, snapshot: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, self._index_path)
+
+    def _schedule_save(self) -> None:
+        if self._save_task and not self._save_task.done():
+            return
+
+        async def save_later() -> None:
+            await asyncio.sleep(5.0)
+            snapshot = {"files": list(self._files.items()), "keys": dict(self._keys)}
+            try:
+                await asyncio.to_thread(self._save, snapshot)
+            except OSError:
+                logger.exception("Failed to write thumbnail index")
+
+        self._save_task = asyncio.create_task(save_later())
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self._file(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _evict(self) -> list[Path]:
+        victims = []
+        while self._total > self.max_bytes and len(self._files) > 1:
+            digest, size = self._files.popitem(last=False)
+            self._total -= size
+            victims.append(self._file(digest))
+        if victims:
+            dropped = {p.stem for p in victims}
+            self._keys = {k: d for k, d in self._keys.items() if d not in dropped}
+        return victims
+
+    def _schedule_unlink(self, victims: list[Path]) -> None:
+        async def unlink_later() -> None:
+            await asyncio.sleep(THUMBNAIL_UNLINK_DELAY)
+            # Skip files whose content was cached again in the meantime
+            stale = [p for p in victims if p.stem not in self._files]
+            await asyncio.to_thread(lambda: [p.unlink(missing_ok=True) for p in stale])
+
+        task = asyncio.create_task(unlink_later())
+        self._unlink_tasks.add(task)
+        task.add_done_callback(self._unlink_tasks.discard)
+
+    def _known_miss(self, key: str) -> bool:
+        now = time.monotonic()
+        while self._misses and next(iter(self._misses.values())) <= now:
+            self._misses.popitem(last=False)
+        return key in self._misses
+
+    async def get_or_create(self, key: str, producer) -> tuple[Path, str] | None:
+        """Returns (file, digest) for `key`, calling `producer()` for the bytes on a miss."""
+        if self._load_task is None:
+            # One read of the index; requests arriving meanwhile wait for the same one
+            self._load_task = asyncio.create_task(self._load())
+        await asyncio.shield(self._load_task)
+
+        digest = self._keys.get(key)
+        if digest and digest in self._files:
+            self._files.move_to_end(digest)
+            return self._file(digest), digest
+
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        if self._known_miss(key):
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await producer()
+            result = None
+            if data:
+                digest = hashlib.sha256(data).hexdigest()
+                if digest not in self._files:
+                    await asyncio.to_thread(self._write, digest, data)
+                    self._files[digest] = len(data)
+                    self._total += len(data)
+                self._files.move_to_end(digest)
+                self._keys[key] = digest
+                victims = self._evict()
+                if victims:
+                    self._schedule_unlink(victims)
+                self._schedule_save()
+                result = (self._file(digest), digest)
+            else:
+                self._misses[key] = time.monotonic() + THUMBNAIL_MISS_TTL
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+
+
+async def _fetch_youtube(youtube_id: str, size: str) -> bytes | None:
+    url = THUMBNAIL_UPSTREAM.format(youtube_id=youtube_id, variant=THUMBNAIL_VARIANTS[size])
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            resp = await client.get(url)
+    except httpx.HTTPError:
+        logger.debug("Failed to fetch thumbnail %s", url)
+        return None
+    if resp.status_code != 200:
+        return None
+    return resp.content
+
+
+async def _render_poster(path: Path, offset: float, width: int) -> bytes | None:
+    """Grabs one frame with ffmpeg, if it is installed."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg, "-v", "error", "-ss", f"{offset:.3f}", "-i", str(path),
+        "-frames:v", "1", "-vf", f"scale={width}:-2", "-f", "image2", "-c:v", "mjpeg", "-",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=15.0)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return None
+    return stdout if proc.returncode == 0 and stdout else None
+
+
+def _image_response(request: Request, result: tuple[Path, str] | None) -> Response:
+    if result is None:
+        return Response(status_code=404)
+    path, digest = result
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={THUMBNAIL_MAX_AGE}, immutable",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+
+router = APIRouter(prefix="/api/thumbnails")
+
+
+@router.get("/yt/{youtube_id}")
+async def youtube_thumbnail(request: Request, youtube_id: str, size: str = Query("medium")):
+    if not _YOUTUBE_ID.fullmatch(youtube_id) or size not in THUMBNAIL_VARIANTS:
+        return Response(status_code=404)
+    result = await thumbnail_cache.get_or_create(
+        f"yt/{youtube_id}/{size}",
+        lambda: _fetch_youtube(youtube_id, size),
+    )
+    return _image_response(request, result)
+
+
+@router.get("/local/{path:path}")
+async def local_poster(request: Request, path: str, size: str = Query("medium")):
+    entry = media_library.get(path)
+    if entry is None or size not in THUMBNAIL_POSTER_WIDTHS:
+        return Response(status_code=404)
+    result = await thumbnail_cache.get_or_create(
+        f"local/{entry.path}/{entry.mtime_ns}/{size}",
+        lambda: _render_poster(media_library.root / entry.path, entry.poster_offset, THUMBNAIL_POSTER_WIDTHS[size]),
+    )
+    return _image_response(request, result)
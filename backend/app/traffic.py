@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+from typing import IO, Any
+
+from .config import TRAFFIC_FLUSH_INTERVAL, TRAFFIC_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficRecorder:
+    """Opt-in capture of inbound WebSocket messages for later replay.
+
+    Each event is one gzipped NDJSON line: [seconds_since_start, room_id,
+    connection_id, message]. `record` only appends to an in-memory list;
+    a background task writes batches from a worker thread.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path: Path | None = None
+        self.recorded = 0
+        self.dropped = 0
+        self._started = 0.0
+        self._pending: list[list[Any]] = []
+        self._file: IO[str] | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def record(self, room_id: str, conn_id: str, msg: dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        if len(self._pending) >= TRAFFIC_MAX_PENDING:
+            self.dropped += 1
+            return
+        self._pending.append([round(time.monotonic() - self._started, 4), room_id, conn_id, msg])
+
+    def start(self, directory: Path) -> Path:
+        if self.enabled:
+            return self.path
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / time.strftime("traffic-%Y%m%d-%H%M%S.ndjson.gz")
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._started = time.monotonic()
+        self.recorded = 0
+        self.dropped = 0
+        self.enabled = True
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("Traffic capture started: %s", self.path)
+        return self.path
+
+    async def stop(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        # The loop does the last flush and closes the file, so no two writes ever overlap
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Traffic capture stopped: %s (%d events, %d dropped)", self.path, self.recorded, self.dropped)
+
+    def _write(self, batch: list[list[Any]]) -> None:
+        self._file.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch))
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        await asyncio.to_thread(self._write, batch)
+        self.recorded += len(batch)
+
+    async def _flush_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), TRAFFIC_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            stopping = self._stopping.is_set()  # read before flushing, so the last batch is always written
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("Traffic capture flush error")
+        await asyncio.to_thread(self._file.close)
+        self._file = None
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": str(self.path) if self.path else None,
+            "recorded": self.recorded,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+        }
+
+
+def load_trace(path: Path) -> list[list[Any]]:
+    events = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    events.append(json.loads(line))
+        except (EOFError, ValueError):
+            # Capture cut short by a crash; keep what was written
+            logger.warning("Trace %s is truncated after %d events", path, len(events))
+    return events
+
+
+traffic_recorder = TrafficRecorder()
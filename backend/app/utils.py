@@ -41,3 +41,33 @@ def detect_video_url(url: str) -> str | None:
     if _VIDEO_EXTENSIONS.search(url):
         return url
     return None
+
+
+_YT_PLAYLIST_PATTERN = re.compile(r"[?&]list=([a-zA-Z0-9_-]+)")
+
+
+def extract_youtube_playlist_id(url: str) -> str | None:
+    match = _YT_PLAYLIST_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    # Bare playlist ID
+    if re.fullmatch(r"(?:PL|UU|LL|FL|OL|RD)[a-zA-Z0-9_-]{10,}", url.strip()):
+        return url.strip()
+    return None
+
+
+_ISO8601_DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?")
+
+
+def parse_iso8601_duration(value: str) -> float:
+    """Parses YouTube contentDetails durations like 'PT1H2M3S'. Returns 0.0 if unknown."""
+    match = _ISO8601_DURATION.fullmatch(value or "")
+    if not match:
+        return 0.0
+    days, hours, minutes, seconds = match.groups()
+    return (
+        int(days or 0) * 86400
+        + int(hours or 0) * 3600
+        + int(minutes or 0) * 60
+        + float(seconds or 0)
+    )
@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from .admission import RETRY_CLOSE_CODE, Rejection, admission
+from .analytics import analytics
+from .handoff import SERVICE_RESTART_CLOSE_CODE, handoff, reconnect_frame
 from .message_handler import handle_message
-from .room_manager import room_manager
+from .models import ChatMessage, User
+from .profiling import room_cpu
+from .room import Room
+from .room_manager import RoomManager, room_manager
+from .traffic import traffic_recorder
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +23,39 @@ router = APIRouter()
 
 @router.websocket("/ws/{room_id}")
 async def websocket_endpoint(ws: WebSocket, room_id: str) -> None:
-    room = room_manager.get_room(room_id)
+    if handoff.draining:
+        # Rooms have moved to the new process; send the client there.
+        await ws.accept()
+        await ws.send_text(json.dumps(reconnect_frame()))
+        await ws.close(code=SERVICE_RESTART_CLOSE_CODE)
+        return
+
+    room = await room_manager.get_room(room_id)
     if not room:
         await ws.accept()
         await ws.close(code=4004, reason="Room not found")
         return
 
     await ws.accept()
+    # Counted from accept so a burst still reading its join frames can't overshoot the caps
+    admission.connections += 1
+    try:
+        await _serve(ws, room)
+    finally:
+        admission.connections -= 1
+
+
+async def _refuse(ws: WebSocket, rejection: Rejection) -> None:
+    await ws.send_text(json.dumps(rejection.to_dict()))
+    await ws.close(code=RETRY_CLOSE_CODE, reason=f"retry_after={rejection.retry_after}")
+
+
+async def _serve(ws: WebSocket, room: Room) -> None:
+    room_id = room.room_id
+    rejection = admission.check_join(room.connections.count)
+    if rejection:
+        await _refuse(ws, rejection)
+        return
 
     # First message must be a join
     try:
@@ -40,7 +74,61 @@ async def websocket_endpoint(ws: WebSocket, room_id: str) -> None:
         return
 
     display_name = data["display_name"].strip()[:30]
-    user = room.add_user(display_name)
+    async with admission.join_slot():
+        # Again, now that the room may have filled up while we waited for the join frame
+        rejection = admission.check_join(room.connections.count)
+        if rejection:
+            await _refuse(ws, rejection)
+            return
+        resume_user_id = handoff.claim(data.get("resume_token"), room.room_id)
+        user = await join_room(room, ws, display_name, resume_user_id)
+    user_id = user.user_id
+    display_name = user.display_name
+    joined_at = time.monotonic()
+    analytics.publish("join", room_id, user_id=user_id, resumed=resume_user_id is not None,
+                      users=len(room.connections.connections))
+    traffic_recorder.record(room_id, user_id, data)
+
+    # Message loop
+    try:
+        while True:
+            raw = await ws.receive_text()
+            try:
+                msg = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if handoff.draining:
+                # The room is being snapshotted for the new process; changes now would be lost
+                await ws.send_text(json.dumps({
+                    "type": "error",
+                    "code": "restarting",
+                    "message": "Server is restarting, please retry in a moment",
+                }))
+                continue
+            traffic_recorder.record(room_id, user_id, msg)
+            if room_cpu.enabled:
+                await room_cpu.run(room_id, handle_message(room, user_id, msg))
+            else:
+                await handle_message(room, user_id, msg)
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("WebSocket error for user %s in room %s", user_id, room_id)
+    finally:
+        if handoff.transferred(room.room_id):
+            # The user lives on in the new process; don't announce a leave.
+            room.connections.remove(user_id)
+        else:
+            traffic_recorder.record(room_id, user_id, {"type": "leave"})
+            analytics.publish("leave", room_id, user_id=user_id, seconds=round(time.monotonic() - joined_at, 1))
+            await leave_room(room, user_id, display_name)
+
+
+async def join_room(room: Room, ws: WebSocket, display_name: str, resume_user_id: str | None = None) -> User:
+    user = room.reconnect_user(resume_user_id) if resume_user_id else None
+    resumed = user is not None
+    if user is None:
+        user = room.add_user(display_name)
     user_id = user.user_id
 
     room.connections.add(user_id, ws)
@@ -57,57 +145,37 @@ async def websocket_endpoint(ws: WebSocket, room_id: str) -> None:
         "type": "user_joined",
         "user": user.to_dict(),
     }, exclude=user_id)
+    if resumed:
+        return user
 
     # System chat
-    from .models import ChatMessage
-    join_msg = ChatMessage(
-        user_id="system",
-        display_name="Sistema",
-        message=f"{display_name} entrou na sala.",
-        is_system=True,
-    )
+    join_msg = ChatMessage.system(f"{display_name} entrou na sala.")
     room.chat_history.append(join_msg)
     await room.connections.broadcast({
         "type": "chat_message",
         **join_msg.to_dict(),
     }, exclude=user_id)
+    return user
 
-    # Message loop
-    try:
-        while True:
-            raw = await ws.receive_text()
-            try:
-                msg = json.loads(raw)
-            except json.JSONDecodeError:
-                continue
-            await handle_message(room, user_id, msg)
-    except WebSocketDisconnect:
-        pass
-    except Exception:
-        logger.exception("WebSocket error for user %s in room %s", user_id, room_id)
-    finally:
-        room.disconnect_user(user_id)
-
-        # Broadcast leave
-        await room.connections.broadcast_all({
-            "type": "user_left",
-            "user_id": user_id,
-        })
-
-        # System chat
-        leave_msg = ChatMessage(
-            user_id="system",
-            display_name="Sistema",
-            message=f"{display_name} saiu da sala.",
-            is_system=True,
-        )
-        room.chat_history.append(leave_msg)
-        await room.connections.broadcast_all({
-            "type": "chat_message",
-            **leave_msg.to_dict(),
-        })
-
-        # Cleanup
-        room.check_user_cleanup(user_id)
-        if room.is_empty():
-            room_manager.remove_room(room_id)
+
+async def leave_room(room: Room, user_id: str, display_name: str, manager: RoomManager = room_manager) -> None:
+    room.disconnect_user(user_id)
+
+    # Broadcast leave
+    await room.connections.broadcast_all({
+        "type": "user_left",
+        "user_id": user_id,
+    })
+
+    # System chat
+    leave_msg = ChatMessage.system(f"{display_name} saiu da sala.")
+    room.chat_history.append(leave_msg)
+    await room.connections.broadcast_all({
+        "type": "chat_message",
+        **leave_msg.to_dict(),
+    })
+
+    # Cleanup
+    room.check_user_cleanup(user_id)
+    if room.is_empty():
+        await manager.remove_room(room.room_id)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import httpx
+
+from .config import YOUTUBE_API_BATCH_SIZE, YOUTUBE_API_KEY
+from .utils import parse_iso8601_duration
+
+logger = logging.getLogger(__name__)
+
+API_BASE = "https://www.googleapis.com/youtube/v3"
+UNKNOWN_TITLE = "Unknown Video"  # shown when metadata could not be fetched; never indexed for search
+
+
+class YouTubeAPIError(Exception):
+    pass
+
+
+async def _get(client: httpx.AsyncClient, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+    resp = await client.get(f"{API_BASE}/{endpoint}", params={**params, "key": YOUTUBE_API_KEY})
+    if resp.status_code != 200:
+        raise YouTubeAPIError(f"{endpoint} returned {resp.status_code}")
+    return resp.json()
+
+
+async def fetch_playlist_video_ids(client: httpx.AsyncClient, playlist_id: str, limit: int) -> list[str]:
+    """Pages through a playlist, stopping as soon as `limit` ids are collected."""
+    ids: list[str] = []
+    page_token: str | None = None
+    while len(ids) < limit:
+        params = {
+            "part": "contentDetails",
+            "playlistId": playlist_id,
+            "maxResults": YOUTUBE_API_BATCH_SIZE,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        data = await _get(client, "playlistItems", params)
+        for item in data.get("items", []):
+            video_id = item.get("contentDetails", {}).get("videoId")
+            if video_id and video_id not in ids:
+                ids.append(video_id)
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+    return ids[:limit]
+
+
+async def fetch_video_details(client: httpx.AsyncClient, video_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Fetches title and duration for many videos in batched calls.
+
+    Private or deleted videos are simply absent from the result.
+    """
+    batches = [
+        video_ids[i:i + YOUTUBE_API_BATCH_SIZE]
+        for i in range(0, len(video_ids), YOUTUBE_API_BATCH_SIZE)
+    ]
+    responses = await asyncio.gather(*(
+        _get(client, "videos", {"part": "snippet,contentDetails", "id": ",".join(batch)})
+        for batch in batches
+    ))
+    details: dict[str, dict[str, Any]] = {}
+    for data in responses:
+        for item in data.get("items", []):
+            snippet = item.get("snippet", {})
+            details[item["id"]] = {
+                "title": snippet.get("title", UNKNOWN_TITLE),
+                "duration": parse_iso8601_duration(item.get("contentDetails", {}).get("duration", "")),
+            }
+    return details
@@ -1,4 +1,4 @@
-import { useEffect, useRef, useState } from 'react';
+import { useEffect, useLayoutEffect, useRef, useState } from 'react';
 import { useRoomContext } from '../context/RoomContext';
 import ChatMessageComp from './ChatMessage';
 import UserList from './UserList';
@@ -7,12 +7,31 @@ export default function ChatTab() {
   const { state, send } = useRoomContext();
   const [input, setInput] = useState('');
   const scrollRef = useRef<HTMLDivElement>(null);
+  const heightBeforeLoad = useRef<number | null>(null);
+  const oldest = state.chat_history[0];
+  const newest = state.chat_history[state.chat_history.length - 1];
 
+  // Follow new messages at the bottom
   useEffect(() => {
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
     }
-  }, [state.chat_history.length]);
+  }, [newest]);
+
+  // Keep the view still when older messages are prepended above it
+  useLayoutEffect(() => {
+    const el = scrollRef.current;
+    if (el && heightBeforeLoad.current !== null) {
+      el.scrollTop += el.scrollHeight - heightBeforeLoad.current;
+      heightBeforeLoad.current = null;
+    }
+  }, [oldest]);
+
+  const loadOlder = () => {
+    if (oldest?.seq === undefined) return;
+    heightBeforeLoad.current = scrollRef.current?.scrollHeight ?? null;
+    send({ type: 'chat_history_before', before: oldest.seq });
+  };
 
   const handleSend = (e: React.FormEvent) => {
     e.preventDefault();
@@ -27,12 +46,21 @@ export default function ChatTab() {
     <div className="flex flex-col h-full">
       <UserList />
       <div ref={scrollRef} className="flex-1 overflow-y-auto py-2">
+        {state.chat_has_more && (
+          <button
+            type="button"
+            onClick={loadOlder}
+            className="block mx-auto mb-2 text-xs text-text-muted hover:text-accent transition-colors"
+          >
+            Carregar mensagens anteriores
+          </button>
+        )}
         {state.chat_history.length === 0 ? (
           <p className="text-text-muted text-xs text-center py-4">Nenhuma mensagem ainda</p>
         ) : (
           state.chat_history.map((msg, i) => (
             <ChatMessageComp
-              key={i}
+              key={msg.seq ?? i}
               message={msg}
               isOwn={msg.user_id === state.your_user_id}
             />
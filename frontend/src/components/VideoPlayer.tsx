@@ -10,6 +10,7 @@ function YouTubePlayer({ isHost }: { isHost: boolean }) {
   useVideoPlayer({
     containerId: 'yt-player',
     sync: state.sync,
+    preload: state.preload,
     isHost,
     send,
   });
@@ -32,6 +33,7 @@ function DirectPlayer({ isHost }: { isHost: boolean }) {
   useDirectVideoPlayer({
     videoRef,
     sync: state.sync,
+    preload: state.preload,
     isHost,
     send,
   });
@@ -1,17 +1,19 @@
 import { useCallback, useEffect, useRef } from 'react';
-import type { SyncState } from '../types/index';
+import type { SyncState, Video } from '../types/index';
 import type { ClientMessage } from '../types/messages';
+import { usePreload } from './usePreload';
 
 const DRIFT_THRESHOLD = 2.0;
 
 interface UseDirectVideoPlayerOptions {
   videoRef: React.RefObject<HTMLVideoElement | null>;
   sync: SyncState;
+  preload: Video | null;
   isHost: boolean;
   send: (msg: ClientMessage) => void;
 }
 
-export function useDirectVideoPlayer({ videoRef, sync, isHost, send }: UseDirectVideoPlayerOptions) {
+export function useDirectVideoPlayer({ videoRef, sync, preload, isHost, send }: UseDirectVideoPlayerOptions) {
   const isHostRef = useRef(isHost);
   isHostRef.current = isHost;
   const syncRef = useRef(sync);
@@ -19,6 +21,9 @@ export function useDirectVideoPlayer({ videoRef, sync, isHost, send }: UseDirect
   const suppressEvents = useRef(false);
   const currentUrl = useRef<string>('');
   const syncReportInterval = useRef<ReturnType<typeof setInterval> | undefined>(undefined);
+  const readySentFor = useRef<string | null>(null);
+
+  usePreload(preload, sync.current_video_id, send);
 
   // Load video when URL changes
   useEffect(() => {
@@ -86,6 +91,15 @@ export function useDirectVideoPlayer({ videoRef, sync, isHost, send }: UseDirect
     send({ type: 'seek', timestamp: video.currentTime });
   }, [send, videoRef]);
 
+  // Tell the server once the current video can play, so a held transition can start
+  const onCanPlay = useCallback(() => {
+    const videoId = syncRef.current.current_video_id;
+    const video = videoRef.current;
+    if (!video || !videoId || readySentFor.current === videoId) return;
+    readySentFor.current = videoId;
+    send({ type: 'sync_report', state: 'ready', video_id: videoId, timestamp: video.currentTime });
+  }, [send, videoRef]);
+
   const onEnded = useCallback(() => {
     if (suppressEvents.current || !isHostRef.current) return;
     send({ type: 'video_ended' });
@@ -100,24 +114,29 @@ export function useDirectVideoPlayer({ videoRef, sync, isHost, send }: UseDirect
     video.addEventListener('pause', onPause);
     video.addEventListener('seeked', onSeeked);
     video.addEventListener('ended', onEnded);
+    video.addEventListener('canplay', onCanPlay);
 
     return () => {
       video.removeEventListener('play', onPlay);
       video.removeEventListener('pause', onPause);
       video.removeEventListener('seeked', onSeeked);
       video.removeEventListener('ended', onEnded);
+      video.removeEventListener('canplay', onCanPlay);
     };
-  }, [videoRef, onPlay, onPause, onSeeked, onEnded]);
+  }, [videoRef, onPlay, onPause, onSeeked, onEnded, onCanPlay]);
 
   // Sync report every 5s
   useEffect(() => {
     syncReportInterval.current = setInterval(() => {
       const video = videoRef.current;
-      if (video && syncRef.current.url) {
+      const videoId = syncRef.current.current_video_id;
+      if (video && syncRef.current.url && videoId) {
         send({
           type: 'sync_report',
           timestamp: video.currentTime,
           state: video.paused ? 'paused' : 'playing',
+          video_id: videoId,
+          ...(Number.isFinite(video.duration) && video.duration > 0 ? { duration: video.duration } : {}),
         });
       }
     }, 5000);
@@ -0,0 +1,50 @@
+import { useEffect } from 'react';
+import type { Video } from '../types/index';
+import type { ClientMessage } from '../types/messages';
+import { loadYouTubeApi } from '../lib/youtube';
+
+// Buffers the announced next video off-screen and tells the server once it is ready,
+// so the next transition does not wait on this client.
+export function usePreload(preload: Video | null, currentVideoId: string | null, send: (msg: ClientMessage) => void) {
+  useEffect(() => {
+    if (!preload || preload.video_id === currentVideoId) return;
+
+    const reportReady = () => {
+      send({ type: 'sync_report', state: 'ready', video_id: preload.video_id, timestamp: 0 });
+    };
+
+    if (preload.video_type === 'direct') {
+      const video = document.createElement('video');
+      video.preload = 'auto';
+      video.muted = true;
+      video.addEventListener('canplay', reportReady, { once: true });
+      video.src = preload.url;
+      return () => {
+        video.removeEventListener('canplay', reportReady);
+        video.removeAttribute('src');
+        video.load();
+      };
+    }
+
+    let player: YT.Player | null = null;
+    let cancelled = false;
+    const container = document.createElement('div');
+    container.style.display = 'none';
+    document.body.appendChild(container);
+
+    loadYouTubeApi().then(() => {
+      if (cancelled) return;
+      player = new window.YT.Player(container, {
+        videoId: preload.youtube_id,
+        playerVars: { autoplay: 0, controls: 0 },
+        events: { onReady: reportReady },
+      });
+    });
+
+    return () => {
+      cancelled = true;
+      player?.destroy();
+      container.remove();
+    };
+  }, [preload?.video_id, currentVideoId, send]);
+}
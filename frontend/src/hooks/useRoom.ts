@@ -2,13 +2,18 @@ import { useCallback, useReducer } from 'react';
 import type { RoomState } from '../types/index';
 import type { ServerMessage } from '../types/messages';
 
+// Live messages kept in memory; history the user paged in on purpose is never trimmed
+const MAX_CHAT_MESSAGES = 500;
+
 const initialState: RoomState = {
   room_id: '',
   users: [],
   queue: [],
   sync: { current_video_id: null, youtube_id: null, timestamp: 0, is_playing: false, last_updated: 0, video_type: 'youtube', url: '' },
-  settings: { max_videos_per_user: 10, skip_vote_threshold: 0.5 },
+  preload: null,
+  settings: { max_videos_per_user: 10, skip_vote_threshold: 0.5, chat_filter: 'mask', block_links: false, flood_protection: true, banned_terms: [] },
   chat_history: [],
+  chat_has_more: false,
   your_user_id: '',
   your_role: 'viewer',
   skip_vote: null,
@@ -34,8 +39,10 @@ function reducer(state: RoomState, action: Action): RoomState {
             users: msg.users,
             queue: msg.queue,
             sync: msg.sync,
+            preload: null,
             settings: msg.settings,
             chat_history: msg.chat_history,
+            chat_has_more: msg.chat_has_more ?? false,
             your_user_id: msg.your_user_id,
             your_role: msg.your_role,
             connected: true,
@@ -65,6 +72,9 @@ function reducer(state: RoomState, action: Action): RoomState {
         case 'sync':
           return { ...state, sync: msg.sync };
 
+        case 'preload':
+          return { ...state, preload: msg.video };
+
         case 'chat_message': {
           const chatMsg = {
             user_id: msg.user_id,
@@ -72,10 +82,25 @@ function reducer(state: RoomState, action: Action): RoomState {
             message: msg.message,
             timestamp: msg.timestamp,
             is_system: msg.is_system,
+            seq: msg.seq,
           };
+          const history = [...state.chat_history, chatMsg];
+          const keep = Math.max(MAX_CHAT_MESSAGES, state.chat_history.length);
+          return {
+            ...state,
+            chat_history: history.slice(-keep),
+            chat_has_more: state.chat_has_more || history.length > keep,
+          };
+        }
+
+        case 'chat_history_page': {
+          // Ignore pages for a position we have already moved past (duplicate clicks)
+          const oldest = state.chat_history[0]?.seq;
+          if (oldest !== undefined && msg.before !== oldest) return state;
           return {
             ...state,
-            chat_history: [...state.chat_history.slice(-99), chatMsg],
+            chat_history: [...msg.messages, ...state.chat_history],
+            chat_has_more: msg.has_more,
           };
         }
 
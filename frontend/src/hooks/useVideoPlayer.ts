@@ -1,18 +1,20 @@
 import { useCallback, useEffect, useRef } from 'react';
-import type { SyncState } from '../types/index';
+import type { SyncState, Video } from '../types/index';
 import type { ClientMessage } from '../types/messages';
 import { loadYouTubeApi } from '../lib/youtube';
+import { usePreload } from './usePreload';
 
 const DRIFT_THRESHOLD = 2.0;
 
 interface UseVideoPlayerOptions {
   containerId: string;
   sync: SyncState;
+  preload: Video | null;
   isHost: boolean;
   send: (msg: ClientMessage) => void;
 }
 
-export function useVideoPlayer({ containerId, sync, isHost, send }: UseVideoPlayerOptions) {
+export function useVideoPlayer({ containerId, sync, preload, isHost, send }: UseVideoPlayerOptions) {
   const playerRef = useRef<YT.Player | null>(null);
   const isHostRef = useRef(isHost);
   isHostRef.current = isHost;
@@ -22,6 +24,9 @@ export function useVideoPlayer({ containerId, sync, isHost, send }: UseVideoPlay
   const currentYtId = useRef<string | null>(null);
   const syncReportInterval = useRef<ReturnType<typeof setInterval> | undefined>(undefined);
   const readyRef = useRef(false);
+  const readySentFor = useRef<string | null>(null);
+
+  usePreload(preload, sync.current_video_id, send);
 
   // Load video when youtube_id changes
   useEffect(() => {
@@ -95,6 +100,15 @@ export function useVideoPlayer({ containerId, sync, isHost, send }: UseVideoPlay
   }, [sync.timestamp, sync.is_playing, sync.youtube_id]);
 
   const onPlayerStateChange = useCallback((event: YT.OnStateChangeEvent) => {
+    // Tell the server once the current video has loaded, so a held transition can start
+    const videoId = syncRef.current.current_video_id;
+    const loaded = event.data === YT.PlayerState.PLAYING || event.data === YT.PlayerState.PAUSED
+      || event.data === YT.PlayerState.CUED;
+    if (loaded && videoId && readySentFor.current !== videoId) {
+      readySentFor.current = videoId;
+      send({ type: 'sync_report', state: 'ready', video_id: videoId, timestamp: event.target.getCurrentTime?.() ?? 0 });
+    }
+
     if (suppressEvents.current || !isHostRef.current) return;
 
     const player = playerRef.current;
@@ -116,12 +130,17 @@ export function useVideoPlayer({ containerId, sync, isHost, send }: UseVideoPlay
   // Sync report every 5s
   useEffect(() => {
     syncReportInterval.current = setInterval(() => {
-      if (playerRef.current && readyRef.current && syncRef.current.youtube_id) {
+      const videoId = syncRef.current.current_video_id;
+      if (playerRef.current && readyRef.current && syncRef.current.youtube_id && videoId) {
         const state = playerRef.current.getPlayerState?.();
+        // The server only learns YouTube durations from these reports
+        const duration = playerRef.current.getDuration?.() ?? 0;
         send({
           type: 'sync_report',
           timestamp: playerRef.current.getCurrentTime?.() ?? 0,
           state: String(state),
+          video_id: videoId,
+          ...(duration > 0 ? { duration } : {}),
         });
       }
     }, 5000);
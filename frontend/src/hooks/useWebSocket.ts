@@ -1,6 +1,8 @@
 import { useCallback, useEffect, useRef, useState } from 'react';
 import type { ClientMessage, ServerMessage } from '../types/messages';
 
+const RETRY_CLOSE_CODE = 4013;
+
 interface UseWebSocketOptions {
   url: string;
   onMessage: (msg: ServerMessage) => void;
@@ -13,6 +15,7 @@ export function useWebSocket({ url, onMessage, onOpen, onClose, enabled = true }
   const wsRef = useRef<WebSocket | null>(null);
   const [connected, setConnected] = useState(false);
   const reconnectTimer = useRef<ReturnType<typeof setTimeout> | undefined>(undefined);
+  const reconnectDelay = useRef(2000);
   const onMessageRef = useRef(onMessage);
   onMessageRef.current = onMessage;
   const onOpenRef = useRef(onOpen);
@@ -40,21 +43,29 @@ export function useWebSocket({ url, onMessage, onOpen, onClose, enabled = true }
     ws.onmessage = (e) => {
       try {
         const data = JSON.parse(e.data) as ServerMessage;
+        // Server restart: come back after the suggested (jittered) delay
+        if (data.type === 'reconnect') reconnectDelay.current = data.delay_ms;
+        // Server busy: come back no sooner than it asked
+        if (data.type === 'error' && data.retry_after) reconnectDelay.current = data.retry_after * 1000;
         onMessageRef.current(data);
       } catch {
         // ignore invalid JSON
       }
     };
 
-    ws.onclose = () => {
+    ws.onclose = (e) => {
       if (!mountedRef.current) return;
+      const retryAfter = e.code === RETRY_CLOSE_CODE ? Number(/retry_after=(\d+)/.exec(e.reason)?.[1]) : NaN;
+      if (retryAfter > 0) reconnectDelay.current = Math.max(reconnectDelay.current, retryAfter * 1000);
       setConnected(false);
       wsRef.current = null;
       onCloseRef.current?.();
-      // Auto-reconnect after 2s
+      // Auto-reconnect after 2s (or the delay the server asked for)
+      const delay = reconnectDelay.current;
+      reconnectDelay.current = 2000;
       reconnectTimer.current = setTimeout(() => {
         if (mountedRef.current && enabledRef.current) connect();
-      }, 2000);
+      }, delay);
     };
 
     ws.onerror = () => {
@@ -3,6 +3,7 @@ import { useParams, useLocation } from 'react-router-dom';
 import { getWsUrl } from '../lib/api';
 import { useWebSocket } from '../hooks/useWebSocket';
 import { useRoom } from '../hooks/useRoom';
+import type { ServerMessage } from '../types/messages';
 import { RoomContext } from '../context/RoomContext';
 import JoinModal from '../components/JoinModal';
 import Navbar from '../components/Navbar';
@@ -18,12 +19,19 @@ export default function RoomPage() {
   const displayNameRef = useRef<string | null>(passedName);
   const { state, handleMessage, setConnected } = useRoom();
   const pendingJoin = useRef(false);
+  const resumeToken = useRef<string | undefined>(undefined);
+
+  const onMessage = useCallback((msg: ServerMessage) => {
+    if (msg.type === 'reconnect' && msg.resume_token) resumeToken.current = msg.resume_token;
+    if (msg.type === 'room_state') resumeToken.current = undefined;
+    handleMessage(msg);
+  }, [handleMessage]);
 
   const wsUrl = roomId ? getWsUrl(roomId) : '';
 
   const { send, connected } = useWebSocket({
     url: wsUrl,
-    onMessage: handleMessage,
+    onMessage,
     onOpen: () => {
       setConnected(true);
       pendingJoin.current = true;
@@ -35,7 +43,7 @@ export default function RoomPage() {
   // Send join when WS connects (pendingJoin flag + send available)
   if (pendingJoin.current && connected && displayNameRef.current) {
     pendingJoin.current = false;
-    send({ type: 'join', display_name: displayNameRef.current });
+    send({ type: 'join', display_name: displayNameRef.current, resume_token: resumeToken.current });
   }
 
   const handleJoin = useCallback((name: string) => {
@@ -29,6 +29,10 @@ export interface SyncState {
 export interface RoomSettings {
   max_videos_per_user: number;
   skip_vote_threshold: number;
+  chat_filter: 'off' | 'mask' | 'block';
+  block_links: boolean;
+  flood_protection: boolean;
+  banned_terms: string[];
 }
 
 export interface ChatMessage {
@@ -37,6 +41,7 @@ export interface ChatMessage {
   message: string;
   timestamp: number;
   is_system: boolean;
+  seq?: number;
 }
 
 export interface SkipVoteState {
@@ -58,8 +63,10 @@ export interface RoomState {
   users: User[];
   queue: Video[];
   sync: SyncState;
+  preload: Video | null;
   settings: RoomSettings;
   chat_history: ChatMessage[];
+  chat_has_more: boolean;
   your_user_id: string;
   your_role: 'host' | 'viewer';
   skip_vote: SkipVoteState | null;
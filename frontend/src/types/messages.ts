@@ -2,26 +2,31 @@ import type { ChatMessage, RoomSettings, SyncState, User, Video } from './index'
 
 // Server → Client messages
 export type ServerMessage =
-  | { type: 'room_state'; room_id: string; users: User[]; queue: Video[]; sync: SyncState; settings: RoomSettings; chat_history: ChatMessage[]; your_user_id: string; your_role: 'host' | 'viewer'; server_time: number }
+  | { type: 'room_state'; room_id: string; users: User[]; queue: Video[]; sync: SyncState; settings: RoomSettings; chat_history: ChatMessage[]; chat_has_more?: boolean; your_user_id: string; your_role: 'host' | 'viewer'; server_time: number }
   | { type: 'user_joined'; user: User }
   | { type: 'user_left'; user_id: string }
-  | { type: 'queue_updated'; queue: Video[]; action: string; video?: Video }
+  | { type: 'queue_updated'; queue: Video[]; action: string; video?: Video; videos?: Video[] }
   | { type: 'sync'; sync: SyncState; server_time: number }
   | { type: 'chat_message' } & ChatMessage
   | { type: 'skip_vote_update'; video_id: string; votes: number; required: number; voters: string[] }
   | { type: 'host_changed'; new_host_id: string; new_host_name: string }
   | { type: 'settings_updated'; settings: RoomSettings }
-  | { type: 'error'; code: string; message: string };
+  | { type: 'preload'; video: Video; starts_in: number }
+  | { type: 'chat_history_page'; before: number; messages: ChatMessage[]; has_more: boolean }
+  | { type: 'reconnect'; delay_ms: number; resume_token?: string }
+  | { type: 'error'; code: string; message: string; retry_after?: number };
 
 // Client → Server messages
 export type ClientMessage =
-  | { type: 'join'; display_name: string }
+  | { type: 'join'; display_name: string; resume_token?: string }
   | { type: 'add_video'; url: string }
+  | { type: 'add_playlist'; url: string }
   | { type: 'remove_video'; video_id: string }
   | { type: 'reorder_queue'; video_ids: string[] }
   | { type: 'skip_vote'; video_id: string }
   | { type: 'chat_message'; message: string }
-  | { type: 'sync_report'; timestamp: number; state: string }
+  | { type: 'chat_history_before'; before: number; limit?: number }
+  | { type: 'sync_report'; timestamp: number; state: string; video_id?: string; duration?: number }
   | { type: 'play' }
   | { type: 'pause'; timestamp: number }
   | { type: 'seek'; timestamp: number }